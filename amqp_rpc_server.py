@@ -24,8 +24,9 @@ from carrot.messaging import Consumer, Publisher
 from carrot.backends import DefaultBackend
 from django.core.exceptions import ObjectDoesNotExist
 
-from pygowave_server.models import Participant, ParticipantConn, Gadget, GadgetElement, Delta
+from pygowave_server.models import Participant, ParticipantConn, Gadget, GadgetElement
 from pygowave_server.common.operations import OpManager
+from pygowave_server.common.checksums import CHECKSUM_ALGORITHMS, negotiate_checksum
 from django.conf import settings
 
 logger = logging.getLogger("pygowave")
@@ -103,6 +104,7 @@ class PyGoWaveMessageProcessor(object):
 		)
 		
 		self.out_queue = {}
+		self.checksum_algorithms = {} # Negotiated at WAVELET_OPEN, by connection id
 		self.purge_connections()
 	
 	def broadcast(self, wavelet, type, property, except_connections=[]):
@@ -110,6 +112,8 @@ class PyGoWaveMessageProcessor(object):
 		Send messages to all participants.
 		
 		`wavelet` must be a Wavelet object.
+		`property` may also be a callable, which returns the property for a
+		given ParticipantConn.
 		`except_connections` is a list of ParticipantConn objects to be
 		excluded from the broadcast.
 		
@@ -118,10 +122,16 @@ class PyGoWaveMessageProcessor(object):
 			"type": type,
 			"property": property
 		}
-		logger.debug("Broadcasting Message:\n" + repr(msg_dict))
+		if not callable(property):
+			logger.debug("Broadcasting Message:\n" + repr(msg_dict))
 		for p in wavelet.participants.all():
 			for conn in p.connections.all():
 				if not conn in except_connections:
+					if callable(property):
+						msg_dict = {
+							"type": type,
+							"property": property(conn)
+						}
 					if self.out_queue.has_key(conn.rx_key):
 						self.out_queue[conn.rx_key].append(msg_dict)
 					else:
@@ -201,10 +211,17 @@ class PyGoWaveMessageProcessor(object):
 			if message["type"] == "WAVELET_OPEN":
 				logger.info("[%s/%d@%s] Opening wavelet" % (participant.name, pconn.id, wavelet.wave.id))
 				pconn.wavelets.add(wavelet)
+				# Pick the cheapest checksum algorithm both sides support
+				offered = None
+				if isinstance(message.get("property", None), dict):
+					offered = message["property"].get("checksums", None)
+				algorithm = negotiate_checksum(offered, getattr(settings, "CHECKSUM_ALGORITHMS", CHECKSUM_ALGORITHMS))
+				self.checksum_algorithms[pconn.id] = algorithm
 				# I know this is neat :)
 				self.emit(pconn, "WAVELET_OPEN", {
 					"wavelet": wavelet.serialize(),
 					"blips": wavelet.serialize_blips(),
+					"checksum": algorithm,
 				})
 			
 			elif message["type"] == "PARTICIPANT_INFO":
@@ -246,11 +263,13 @@ class PyGoWaveMessageProcessor(object):
 					logger.error("[%s/%d@%s] Target participant '%s' already there" % (participant.name, pconn.id, wavelet.wave.id, message["property"]))
 					return # Fail silently (TODO: report error to user)
 				wavelet.participants.add(p)
+				wavelet.invalidate_inbox_digests()
 				logger.info("[%s/%d@%s] Added new participant '%s'" % (participant.name, pconn.id, wavelet.wave.id, message["property"]))
 				self.broadcast(wavelet, "WAVELET_ADD_PARTICIPANT", message["property"])
 				
 			elif message["type"] == "WAVELET_REMOVE_SELF":
 				self.broadcast(wavelet, "WAVELET_REMOVE_PARTICIPANT", participant.id)
+				wavelet.invalidate_inbox_digests()
 				wavelet.participants.remove(participant) # Bye bye
 				pconn.wavelets.remove(wavelet) # Also for your connection
 				logger.info("[%s/%d@%s] Participant removed himself" % (participant.name, pconn.id, wavelet.wave.id))
@@ -270,21 +289,24 @@ class PyGoWaveMessageProcessor(object):
 					for op in delta.getOpManager().operations:
 						newdelta.transform(op) # Trash results (an existing delta cannot be changed)
 				
-				# Apply
-				wavelet.applyOperations(newdelta.operations)
+				# Merge adjacent operations
+				newdelta.normalize()
 				
-				# Raise version and store
-				wavelet.version += 1
-				wavelet.save()
+				# Apply, raise version and store (in one transaction)
+				wavelet.applyOperationBundle(newdelta)
 				
-				Delta.createByOpManager(newdelta, wavelet.version).save()
-				
-				# Create tentative checksums
-				blipsums = wavelet.blipsums()
+				# Create tentative checksums (once per algorithm in use)
+				blipsums = {}
+				def conn_blipsums(conn):
+					algorithm = self.checksum_algorithms.get(conn.id, "sha1")
+					if not blipsums.has_key(algorithm):
+						blipsums[algorithm] = wavelet.blipsums(algorithm)
+					return blipsums[algorithm]
 				
 				# Respond
-				self.emit(pconn, "OPERATION_MESSAGE_BUNDLE_ACK", {"version": wavelet.version, "blipsums": blipsums})
-				self.broadcast(wavelet, "OPERATION_MESSAGE_BUNDLE", {"version": wavelet.version, "operations": newdelta.serialize(), "blipsums": blipsums}, [pconn])
+				self.emit(pconn, "OPERATION_MESSAGE_BUNDLE_ACK", {"version": wavelet.version, "blipsums": conn_blipsums(pconn)})
+				serial_ops = newdelta.serialize()
+				self.broadcast(wavelet, "OPERATION_MESSAGE_BUNDLE", lambda conn: {"version": wavelet.version, "operations": serial_ops, "blipsums": conn_blipsums(conn)}, [pconn])
 				
 				logger.debug("[%s/%d@%s] Processed delta #%d -> v%d" % (participant.name, pconn.id, wavelet.wave.id, version, wavelet.version))
 				
@@ -312,6 +334,8 @@ class PyGoWaveMessageProcessor(object):
 			if conn.wavelets.count() == 0 and datetime.datetime.now() > conn.created + self.conn_min_lifetime:
 				conn_id, conn_participant_name = conn.id, conn.participant.name
 				conn.delete()
+				if self.checksum_algorithms.has_key(conn_id):
+					del self.checksum_algorithms[conn_id]
 				logger.info("[%s/%d] Connection to server closed" % (conn_participant_name, conn_id))
 		self.next_purge = datetime.datetime.now() + self.purge_every
 
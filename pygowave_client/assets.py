@@ -0,0 +1,211 @@
+
+#
+# PyGoWave Server - The Python Google Wave Server
+# Copyright 2009 Patrick Schneider <patrick.p2k.schneider@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.hashcompat import sha_constructor
+
+from pygowave_client.settings import *
+from pygowave_client.fileserve import is_not_modified
+
+from cStringIO import StringIO
+import gzip, threading, time
+
+try:
+	import brotli
+except ImportError:
+	brotli = None
+
+class AssetError(Exception):
+	"""
+	Raised if an asset could not be built. The message is sent to the client
+	instead of the asset.
+	
+	"""
+	pass
+
+def accepted_encodings(accept_encoding):
+	"""
+	Return the list of content codings accepted by an Accept-Encoding
+	header.
+	
+	"""
+	accepted = []
+	for coding in accept_encoding.split(","):
+		coding = coding.strip().split(";")
+		params = [p.strip().replace(" ", "") for p in coding[1:]]
+		if not "q=0" in params and not "q=0.0" in params:
+			accepted.append(coding[0].strip().lower())
+	return accepted
+
+def cache_control(request, version):
+	"""
+	Return the Cache-Control header for a script. Requests whose "v"
+	parameter matches the current version may be cached forever.
+	
+	"""
+	if version != None and request.GET.get("v", None) == version:
+		return "public, max-age=%d, immutable" % (ASSET_MAX_AGE)
+	return "public, max-age=0, must-revalidate"
+
+class Asset(object):
+	"""
+	A static asset held in memory, along with its precompressed variants and
+	validators.
+	
+	"""
+	
+	def __init__(self, data, mtime, token):
+		self.data = data
+		self.mtime = mtime
+		self.token = token
+		self.hash = sha_constructor(data).hexdigest()
+		self.version = self.hash[:ASSET_VERSION_LENGTH]
+		
+		buf = StringIO()
+		gz = gzip.GzipFile(fileobj=buf, mode="wb", compresslevel=9)
+		gz.write(data)
+		gz.close()
+		self.gzip = buf.getvalue()
+		
+		if brotli != None:
+			self.brotli = brotli.compress(data)
+		else:
+			self.brotli = None
+		
+		self.checked = time.time()
+	
+	def etag(self, encoding=None):
+		"""
+		Return the strong entity tag of the given variant.
+		
+		"""
+		if encoding == None:
+			return '"%s"' % (self.hash)
+		return '"%s-%s"' % (self.hash, encoding)
+	
+	def encoded(self, accept_encoding):
+		"""
+		Return the smallest variant acceptable for the given Accept-Encoding
+		header as a (content, encoding) tuple; encoding is None for the
+		uncompressed data.
+		
+		"""
+		accepted = accepted_encodings(accept_encoding)
+		if self.brotli != None and "br" in accepted:
+			return self.brotli, "br"
+		elif "gzip" in accepted:
+			return self.gzip, "gzip"
+		else:
+			return self.data, None
+
+class AssetCache(object):
+	"""
+	Process-level cache of static assets.
+	
+	Each asset is identified by a key and described by two callables:
+	`validate` returns a token which changes whenever the asset changes
+	(e.g. the modification time of its source) and `load` returns a
+	(data, mtime) tuple. `validate` is called at most once every
+	`check_interval` seconds per asset, `load` only if the token changed.
+	
+	Assets are validated and loaded with a lock per key, so loading one
+	asset does not block requests for others.
+	
+	"""
+	
+	def __init__(self, check_interval=2):
+		self.check_interval = check_interval
+		self._assets = {}
+		self._key_locks = {}
+		self._lock = threading.Lock() # Guards _key_locks and invalidation
+	
+	def _key_lock(self, key):
+		self._lock.acquire()
+		try:
+			return self._key_locks.setdefault(key, threading.Lock())
+		finally:
+			self._lock.release()
+	
+	def get(self, key, validate, load):
+		"""
+		Return the Asset for `key`, (re)loading it if necessary.
+		
+		"""
+		asset = self._assets.get(key, None)
+		now = time.time()
+		if asset != None and now - asset.checked < self.check_interval:
+			return asset
+		
+		lock = self._key_lock(key)
+		lock.acquire()
+		try:
+			asset = self._assets.get(key, None)
+			if asset != None and now - asset.checked < self.check_interval:
+				return asset
+			token = validate()
+			if asset != None and asset.token == token:
+				asset.checked = now
+				return asset
+			data, mtime = load()
+			asset = Asset(data, mtime, token)
+			self._assets[key] = asset
+			return asset
+		finally:
+			lock.release()
+	
+	def invalidate(self, key=None):
+		"""
+		Drop an asset (or all assets, if `key` is None) from the cache.
+		
+		"""
+		self._lock.acquire()
+		try:
+			if key == None:
+				self._assets.clear()
+			elif self._assets.has_key(key):
+				del self._assets[key]
+		finally:
+			self._lock.release()
+
+def asset_response(request, asset, mimetype="text/javascript"):
+	"""
+	Create a HttpResponse for `asset`. Handles If-None-Match and
+	If-Modified-Since and picks the best encoding for the client. Requests
+	whose "v" parameter matches the version of the asset may be cached
+	forever.
+	
+	"""
+	
+	content, encoding = asset.encoded(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+	etag = asset.etag(encoding)
+	
+	if is_not_modified(request, etag, asset.mtime):
+		response = HttpResponseNotModified()
+	else:
+		response = HttpResponse(content, mimetype=mimetype)
+		response["Content-Length"] = str(len(content))
+		if encoding != None:
+			response["Content-Encoding"] = encoding
+	
+	response["ETag"] = etag
+	response["Last-Modified"] = asset.mtime.strftime(RFC_1123_DATETIME)
+	response["Cache-Control"] = cache_control(request, asset.version)
+	response["Vary"] = "Accept-Encoding"
+	return response
+
+asset_cache = AssetCache(ASSET_CHECK_INTERVAL)
@@ -0,0 +1,333 @@
+
+#
+# PyGoWave Server - The Python Google Wave Server
+# Copyright 2009 Patrick Schneider <patrick.p2k.schneider@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from django.http import Http404
+from django.utils import simplejson
+from django.utils.hashcompat import sha_constructor
+
+from pygowave_client.settings import *
+from pygowave_client.minify import minify, MinifyError
+
+from datetime import datetime
+from cStringIO import StringIO
+import os, errno, gzip, tempfile, threading
+
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+
+try:
+	import brotli
+except ImportError:
+	brotli = None
+
+def write_atomic(filename, data):
+	"""
+	Write `data` to `filename` so that readers either see the old or the
+	new file, never a partially written one.
+	
+	"""
+	fd, tmpname = tempfile.mkstemp(dir=os.path.dirname(filename), prefix=".tmp")
+	try:
+		f = os.fdopen(fd, "wb")
+		try:
+			f.write(data)
+		finally:
+			f.close()
+		os.chmod(tmpname, 0644)
+		if os.name != "posix" and os.path.exists(filename):
+			os.unlink(filename) # rename does not replace files on Windows
+		os.rename(tmpname, filename)
+	except:
+		if os.path.exists(tmpname):
+			os.unlink(tmpname)
+		raise
+
+def module_files(package, module):
+	"""
+	Return the source file (without extension), the cache file and the
+	namespace of a module.
+	
+	"""
+	return (
+		SRC_FOLDER + package + os.path.sep + module,
+		CACHE_FOLDER + package + os.path.sep + module + ".js",
+		"pygowave.%s" % (package),
+	)
+
+def served_file(cachefile):
+	"""
+	Return the name of the file which is served for the compiled script
+	`cachefile` (the minified version if MINIFY is set).
+	
+	"""
+	if MINIFY:
+		return cachefile[:-3] + ".min.js"
+	return cachefile
+
+class CompileLock(object):
+	"""
+	Exclusive lock on a compiled script. Threads of this process are
+	serialized with a threading.Lock, other processes with an fcntl lock on
+	a ".lock" file next to the script (on POSIX systems).
+	
+	"""
+	
+	_thread_locks = {}
+	_thread_locks_lock = threading.Lock()
+	
+	def __init__(self, cachefile):
+		self.lockfile = cachefile + ".lock"
+		CompileLock._thread_locks_lock.acquire()
+		try:
+			self.thread_lock = CompileLock._thread_locks.setdefault(cachefile, threading.Lock())
+		finally:
+			CompileLock._thread_locks_lock.release()
+		self.f = None
+	
+	def acquire(self):
+		self.thread_lock.acquire()
+		if fcntl != None:
+			try:
+				self.f = open(self.lockfile, "a")
+				fcntl.flock(self.f.fileno(), fcntl.LOCK_EX)
+			except:
+				if self.f != None:
+					self.f.close()
+					self.f = None
+				self.thread_lock.release()
+				raise
+	
+	def release(self):
+		if self.f != None:
+			fcntl.flock(self.f.fileno(), fcntl.LOCK_UN)
+			self.f.close()
+			self.f = None
+		self.thread_lock.release()
+
+def is_outdated(srcfile, cachefile):
+	return not os.path.exists(cachefile) or os.path.getmtime(srcfile) > os.path.getmtime(cachefile)
+
+def compile_and_cache(srcfile, cachefile, package, namespace, force=False):
+	"""
+	Compile (.py) or copy (.js) `srcfile` to `cachefile` if the source is
+	newer (or `force` is True). Returns ("changed", mtime) or ("unchanged",
+	mtime) with the modification time of the source or ("error", message).
+	
+	Only one thread or process compiles a script at a time; others wait for
+	it and use its result. The cache file is replaced atomically, so readers
+	see either the previous or the new version.
+	
+	"""
+	if os.path.exists(srcfile + ".py"):
+		srcfile += ".py"
+	elif os.path.exists(srcfile + ".js"):
+		srcfile += ".js"
+	else:
+		raise Http404
+	
+	mtime = datetime.utcfromtimestamp(os.path.getmtime(srcfile))
+	if not force and not is_outdated(srcfile, cachefile):
+		return ("unchanged", mtime)
+	
+	if not os.path.exists(CACHE_FOLDER + package):
+		try:
+			os.makedirs(CACHE_FOLDER + package)
+		except OSError:
+			if not os.path.isdir(CACHE_FOLDER + package):
+				raise
+	
+	lock = CompileLock(cachefile)
+	lock.acquire()
+	try:
+		# Another worker might have compiled the script while we waited
+		if not force and not is_outdated(srcfile, cachefile):
+			return ("changed", mtime)
+		return compile_locked(srcfile, cachefile, namespace, mtime)
+	finally:
+		lock.release()
+
+def compile_locked(srcfile, cachefile, namespace, mtime):
+	"""
+	Compile (.py) or copy (.js) a script; called by compile_and_cache with
+	the lock held.
+	
+	"""
+	package_folder = os.path.dirname(cachefile)
+	if srcfile.endswith(".py"):
+		from pycow import translate_file, ParseError # Import has been placed here, so PyCow is not a dependency
+		fd, tmpname = tempfile.mkstemp(dir=package_folder, prefix=".tmp")
+		os.close(fd)
+		try:
+			translate_file(srcfile, tmpname, namespace=namespace, warnings=False)
+			os.chmod(tmpname, 0644)
+			if os.name != "posix" and os.path.exists(cachefile):
+				os.unlink(cachefile) # rename does not replace files on Windows
+			os.rename(tmpname, cachefile)
+		except ParseError, e:
+			os.unlink(tmpname)
+			return ("error", PARSE_ERROR_MESSAGE % (srcfile, e.value))
+		except:
+			os.unlink(tmpname)
+			raise
+	elif os.name == "posix":
+		# Symlink the source; the rename makes the replacement atomic
+		target = os.path.relpath(srcfile, package_folder)
+		while True:
+			tmpname = os.path.join(package_folder, ".tmp%d.%s" % (os.getpid(), os.urandom(4).encode("hex")))
+			try:
+				os.symlink(target, tmpname)
+				break
+			except OSError, e:
+				if e.errno != errno.EEXIST:
+					raise
+		os.rename(tmpname, cachefile)
+	else:
+		write_atomic(cachefile, open(srcfile, 'r').read())
+	return ("changed", mtime)
+
+def combine_modules():
+	"""
+	Return the concatenation of all compiled modules. The license header of
+	the first module is kept, the others are stripped.
+	
+	"""
+	out = StringIO()
+	first = True
+	for package, modules in STATIC_LOAD_ORDER:
+		for module in modules:
+			mcf = open(module_files(package, module)[1], 'r')
+			infoline = "/* --- pygowave.%s.%s --- */\n\n" % (package, module)
+			if first:
+				first = False
+				# Leave license information; stop after it
+				line = mcf.readline()
+				while (line.startswith("/*") and not line.startswith("/**")) or line.startswith(" *") or line == "\n":
+					out.write(line)
+					line = mcf.readline()
+				out.write(infoline)
+				out.write(line)
+			else:
+				# Strip license information
+				line = mcf.readline()
+				while (line.startswith("/*") and not line.startswith("/**")) or line.startswith(" *") or line == "\n":
+					line = mcf.readline()
+				out.write("\n" + infoline)
+				out.write(line)
+			out.write(mcf.read())
+			mcf.close()
+	return out.getvalue()
+
+def gzip_data(data):
+	"""
+	Return `data` compressed with gzip.
+	
+	"""
+	buf = StringIO()
+	gz = gzip.GzipFile(fileobj=buf, mode="wb", compresslevel=9)
+	gz.write(data)
+	gz.close()
+	return buf.getvalue()
+
+def write_compressed(filename, data):
+	"""
+	Write precompressed variants of `data` next to `filename` (.gz and, if
+	the brotli module is installed, .br). Returns the size of the gzipped
+	data.
+	
+	"""
+	gzdata = gzip_data(data)
+	write_atomic(filename + ".gz", gzdata)
+	if brotli != None:
+		write_atomic(filename + ".br", brotli.compress(data))
+	return len(gzdata)
+
+def write_served(cachefile, data, minified, mangle=False):
+	"""
+	Write the served version of the compiled script `cachefile` (with the
+	contents `data`), minifying it if `minified` is True. Returns a tuple
+	of the served data and a size report.
+	
+	"""
+	if minified:
+		try:
+			served = minify(data, mangle)
+		except MinifyError, e:
+			raise ValueError("Could not minify %s: %s" % (cachefile, e.args[0]))
+		filename = cachefile[:-3] + ".min.js"
+		write_atomic(filename, served)
+	else:
+		served = data
+		filename = cachefile
+	gzsize = write_compressed(filename, served)
+	if minified:
+		report = "%d bytes, minified %d bytes (%d%%), gzipped %d bytes" % (len(data), len(served), len(served) * 100 / max(len(data), 1), gzsize)
+	else:
+		report = "%d bytes, gzipped %d bytes" % (len(data), gzsize)
+	return served, report
+
+def content_version(data):
+	"""
+	Return the version string (a prefix of the SHA-1 hash) of some content.
+	
+	"""
+	return sha_constructor(data).hexdigest()[:ASSET_VERSION_LENGTH]
+
+def read_manifest():
+	"""
+	Return the manifest written by build_client or None if there is none.
+	
+	"""
+	try:
+		return simplejson.loads(open(MANIFEST_FILE, "r").read())
+	except (IOError, ValueError):
+		return None
+
+def build_client(force=False, log=None, minified=MINIFY, mangle=False):
+	"""
+	Compile every module in STATIC_LOAD_ORDER, write the combined script,
+	precompressed variants and a manifest mapping each script to its
+	content version. If `force` is True, all modules are recompiled. If
+	`minified` is True, minified versions are written as well (see
+	minify.minify for `mangle`) and the versions refer to them.
+	Raises ValueError if a module could not be compiled or minified.
+	
+	"""
+	manifest = {"modules": {}}
+	for package, modules in STATIC_LOAD_ORDER:
+		for module in modules:
+			srcfile, cachefile, namespace = module_files(package, module)
+			result, mtime = compile_and_cache(srcfile, cachefile, package, namespace, force)
+			if result == "error":
+				raise ValueError(mtime)
+			served, report = write_served(cachefile, open(cachefile, "r").read(), minified, mangle)
+			manifest["modules"]["%s/%s" % (package, module)] = content_version(served)
+			if log != None:
+				log("%s.%s: %s, %s" % (namespace, module, result, report))
+	
+	data = combine_modules()
+	write_atomic(COMBINED_FILE, data)
+	served, report = write_served(COMBINED_FILE, data, minified, mangle)
+	manifest["combined"] = content_version(served)
+	manifest["minified"] = minified
+	if log != None:
+		log("Combined script: %s" % (report))
+	
+	write_atomic(MANIFEST_FILE, simplejson.dumps(manifest, sort_keys=True, indent=1))
+	return manifest
@@ -0,0 +1,161 @@
+
+#
+# PyGoWave Server - The Python Google Wave Server
+# Copyright 2009 Patrick Schneider <patrick.p2k.schneider@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+
+from pygowave_client.settings import *
+
+from datetime import datetime
+import os, re
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+class FileIterator(object):
+	"""
+	Iterates over `length` bytes of an open file, starting at `offset`, in
+	chunks of `chunk_size` bytes. The file is closed when the iterator is
+	exhausted or closed.
+	
+	"""
+	
+	def __init__(self, f, offset, length, chunk_size=65536):
+		self.f = f
+		self.remaining = length
+		self.chunk_size = chunk_size
+		if offset > 0:
+			f.seek(offset)
+	
+	def __iter__(self):
+		return self
+	
+	def next(self):
+		if self.remaining <= 0:
+			self.close()
+			raise StopIteration
+		chunk = self.f.read(min(self.chunk_size, self.remaining))
+		if not chunk:
+			self.close()
+			raise StopIteration
+		self.remaining -= len(chunk)
+		return chunk
+	
+	def close(self):
+		if not self.f.closed:
+			self.f.close()
+
+def is_not_modified(request, etag, mtime):
+	"""
+	Evaluate If-None-Match (or, if absent, If-Modified-Since) against the
+	given validators.
+	
+	"""
+	if request.META.has_key("HTTP_IF_NONE_MATCH"):
+		etags = [e.strip() for e in request.META["HTTP_IF_NONE_MATCH"].split(",")]
+		return etag in etags or "*" in etags
+	elif request.META.has_key("HTTP_IF_MODIFIED_SINCE"):
+		try:
+			return mtime <= datetime.strptime(request.META["HTTP_IF_MODIFIED_SINCE"], RFC_1123_DATETIME)
+		except ValueError:
+			pass
+	return False
+
+def parse_range(request, etag, size):
+	"""
+	Return the (first, last) byte positions requested by a single-range
+	Range header, None if the whole file should be sent or False if the
+	range cannot be satisfied. Multiple ranges are not supported and
+	answered with the whole file, as are ranges with a non-matching If-Range
+	header.
+	
+	"""
+	if not request.META.has_key("HTTP_RANGE"):
+		return None
+	if request.META.get("HTTP_IF_RANGE", etag) != etag:
+		return None
+	m = RANGE_RE.match(request.META["HTTP_RANGE"].strip())
+	if m == None or (m.group(1) == "" and m.group(2) == ""):
+		return None
+	if m.group(1) == "":
+		# Suffix range: the last n bytes
+		length = int(m.group(2))
+		if length == 0:
+			return False
+		return max(size - length, 0), size - 1
+	first = int(m.group(1))
+	last = size - 1
+	if m.group(2) != "":
+		last = min(int(m.group(2)), size - 1)
+		if last < first:
+			return None
+	if first >= size:
+		return False
+	return first, last
+
+def serve_file(request, filename, mimetype, encoding=None, cache_control=None):
+	"""
+	Create a response for a file on disk without reading it into memory.
+	
+	Conditional requests are answered here. The body is then either
+	offloaded to the web server (if CLIENT_SENDFILE is "x-sendfile" or
+	"x-accel-redirect") or streamed in chunks, honoring single byte ranges.
+	`encoding` is sent as Content-Encoding if given.
+	
+	"""
+	try:
+		stat = os.stat(filename)
+	except OSError:
+		raise Http404
+	
+	size = stat.st_size
+	mtime = datetime.utcfromtimestamp(stat.st_mtime)
+	etag = '"%x-%x"' % (int(stat.st_mtime), size)
+	
+	if is_not_modified(request, etag, mtime):
+		response = HttpResponseNotModified()
+	elif SENDFILE == "x-sendfile":
+		response = HttpResponse(mimetype=mimetype)
+		response["X-Sendfile"] = filename
+	elif SENDFILE == "x-accel-redirect":
+		if not filename.startswith(CACHE_FOLDER):
+			raise Http404
+		response = HttpResponse(mimetype=mimetype)
+		response["X-Accel-Redirect"] = SENDFILE_URL + filename[len(CACHE_FOLDER):].replace(os.path.sep, "/")
+	else:
+		byte_range = parse_range(request, etag, size)
+		if byte_range == False:
+			response = HttpResponse(status=416)
+			response["Content-Range"] = "bytes */%d" % (size)
+			return response
+		if byte_range == None:
+			first, last = 0, size - 1
+			response = HttpResponse(FileIterator(open(filename, "rb"), 0, size), mimetype=mimetype)
+		else:
+			first, last = byte_range
+			response = HttpResponse(FileIterator(open(filename, "rb"), first, last - first + 1), mimetype=mimetype)
+			response.status_code = 206
+			response["Content-Range"] = "bytes %d-%d/%d" % (first, last, size)
+		response["Content-Length"] = str(last - first + 1)
+		response["Accept-Ranges"] = "bytes"
+	
+	if encoding != None and response.status_code != 304:
+		response["Content-Encoding"] = encoding
+	response["ETag"] = etag
+	response["Last-Modified"] = mtime.strftime(RFC_1123_DATETIME)
+	if cache_control != None:
+		response["Cache-Control"] = cache_control
+	return response
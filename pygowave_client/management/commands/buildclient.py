@@ -0,0 +1,54 @@
+
+#
+# PyGoWave Server - The Python Google Wave Server
+# Copyright 2009 Patrick Schneider <patrick.p2k.schneider@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from django.core.management.base import NoArgsCommand, CommandError
+
+from pygowave_client.build import build_client
+from pygowave_client.settings import MINIFY
+
+from optparse import make_option
+
+class Command(NoArgsCommand):
+	"""
+	Compile all client scripts ahead of time, so no user has to wait for
+	PyCow after a deployment. Writes the combined script, minified and
+	precompressed variants and the manifest into the cache folder and
+	reports the size of each script.
+	
+	"""
+	
+	option_list = NoArgsCommand.option_list + (
+		make_option('--force', action='store_true', dest='force', default=False,
+			help='Recompile all modules, even if they are up to date.'),
+		make_option('--minify', action='store_true', dest='minify', default=MINIFY,
+			help='Write minified scripts (default: CLIENT_MINIFY setting).'),
+		make_option('--mangle', action='store_true', dest='mangle', default=False,
+			help='Shorten local identifiers when minifying (requires slimit).'),
+	)
+	help = 'Compiles the PyGoWave client scripts and writes the combined script and manifest.'
+	
+	def handle_noargs(self, **options):
+		verbose = int(options.get("verbosity", 1)) > 0
+		def log(message):
+			if verbose:
+				print message
+		try:
+			manifest = build_client(options["force"], log, options["minify"], options["mangle"])
+		except ValueError, e:
+			raise CommandError(e.args[0])
+		log("Combined script version: %s" % (manifest["combined"]))
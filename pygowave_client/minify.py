@@ -0,0 +1,192 @@
+
+#
+# PyGoWave Server - The Python Google Wave Server
+# Copyright 2009 Patrick Schneider <patrick.p2k.schneider@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+A small JavaScript minifier in the spirit of JSMin. Removes comments and
+whitespace while keeping line breaks where automatic semicolon insertion
+could depend on them. The license comment at the top of a script is kept.
+
+Local identifiers are shortened only if the optional "slimit" module is
+installed and `mangle` is requested.
+
+"""
+
+__all__ = ["minify", "MinifyError"]
+
+# Keywords after which a slash starts a regular expression
+REGEX_KEYWORDS = ("return", "typeof", "case", "do", "else", "in", "instanceof", "new", "delete", "void", "throw")
+
+# Characters which end a statement if followed by a line break
+ASI_END = ")]}+-\"'"
+
+# Characters which may start a statement after a line break
+ASI_START = "([{+-!~\"'/"
+
+class MinifyError(Exception):
+	pass
+
+def is_word_char(c):
+	return c.isalnum() or c in "_$\\" or ord(c) > 126
+
+def tokenize(script):
+	"""
+	Split a script into (type, text) tuples. The types are "space", "newline"
+	(whitespace containing a line break), "comment", "string", "regex",
+	"word" and "punct".
+	
+	"""
+	tokens = []
+	i, n = 0, len(script)
+	last = None # Last significant token
+	while i < n:
+		c = script[i]
+		if c in " \t\r\n\f\v":
+			j = i
+			while j < n and script[j] in " \t\r\n\f\v":
+				j += 1
+			if "\n" in script[i:j] or "\r" in script[i:j]:
+				tokens.append(("newline", script[i:j]))
+			else:
+				tokens.append(("space", script[i:j]))
+			i = j
+		elif script.startswith("//", i):
+			j = i
+			while j < n and not script[j] in "\r\n":
+				j += 1
+			tokens.append(("comment", script[i:j]))
+			i = j
+		elif script.startswith("/*", i):
+			j = script.find("*/", i + 2)
+			if j == -1:
+				raise MinifyError("Unterminated comment")
+			text = script[i:j+2]
+			if "\n" in text:
+				# Comments spanning lines count as line breaks for ASI
+				tokens.append(("newline", "\n"))
+			tokens.append(("comment", text))
+			i = j + 2
+		elif c in "\"'":
+			j = i + 1
+			while True:
+				if j >= n or script[j] in "\r\n":
+					raise MinifyError("Unterminated string literal")
+				if script[j] == "\\":
+					j += 2
+				elif script[j] == c:
+					break
+				else:
+					j += 1
+			last = ("string", script[i:j+1])
+			tokens.append(last)
+			i = j + 1
+		elif c == "/" and (last == None or (last[0] == "punct" and not last[1] in ")]") or (last[0] == "word" and last[1] in REGEX_KEYWORDS)):
+			j = i + 1
+			in_class = False
+			while True:
+				if j >= n or script[j] in "\r\n":
+					raise MinifyError("Unterminated regular expression")
+				if script[j] == "\\":
+					j += 2
+					continue
+				if script[j] == "[":
+					in_class = True
+				elif script[j] == "]":
+					in_class = False
+				elif script[j] == "/" and not in_class:
+					break
+				j += 1
+			last = ("regex", script[i:j+1])
+			tokens.append(last)
+			i = j + 1
+		elif is_word_char(c):
+			j = i
+			while j < n and is_word_char(script[j]):
+				j += 1
+			last = ("word", script[i:j])
+			tokens.append(last)
+			i = j
+		else:
+			last = ("punct", c)
+			tokens.append(last)
+			i += 1
+	return tokens
+
+def header(tokens):
+	"""
+	Return the number of comment and whitespace tokens at the start of a
+	script and the block comments among them (usually the license).
+	
+	"""
+	comments = []
+	i = 0
+	while i < len(tokens) and tokens[i][0] in ("space", "newline", "comment"):
+		if tokens[i][0] == "comment" and tokens[i][1].startswith("/*"):
+			comments.append(tokens[i][1] + "\n")
+		i += 1
+	return i, "".join(comments)
+
+def strip(script):
+	"""
+	Remove comments and unneeded whitespace from a script.
+	
+	"""
+	tokens = tokenize(script)
+	i, license = header(tokens)
+	out = [license]
+	
+	prev = None
+	prev_type = None
+	gap = None
+	for type, text in tokens[i:]:
+		if type in ("space", "comment"):
+			if gap == None:
+				gap = " "
+			continue
+		elif type == "newline":
+			gap = "\n"
+			continue
+		
+		if prev != None and gap != None:
+			a, b = prev[-1], text[0]
+			if gap == "\n" and (is_word_char(a) or a in ASI_END) and (is_word_char(b) or b in ASI_START):
+				out.append("\n")
+			elif (is_word_char(a) and is_word_char(b)) or (a in "+-/" and b == a) or (prev_type == "regex" and is_word_char(b)):
+				# Keep tokens from merging (e.g. "a / /x/" into a comment or
+				# "/x/ in" into regex flags)
+				out.append(" ")
+		out.append(text)
+		prev = text
+		prev_type = type
+		gap = None
+	
+	return "".join(out).rstrip() + "\n"
+
+def minify(script, mangle=False):
+	"""
+	Return the minified version of `script`. If `mangle` is True and slimit
+	is installed, local identifiers are shortened as well.
+	
+	"""
+	if mangle:
+		try:
+			import slimit
+		except ImportError:
+			pass
+		else:
+			return header(tokenize(script))[1] + slimit.minify(script, mangle=True) + "\n"
+	return strip(script)
@@ -16,11 +16,13 @@
 # limitations under the License.
 #
 
+from django.conf import settings as django_settings
+
 import os.path
 
 STATIC_LOAD_ORDER = (
 	(
-		"utils", ("sha1",)
+		"utils", ("sha1", "crc32")
 	),
 	(
 		"model", ("model",)
@@ -50,6 +52,37 @@ SRC_FOLDER = os.path.dirname(os.path.abspath(__file__)) + os.path.sep + "src" +
 
 CACHE_FOLDER = os.path.dirname(os.path.abspath(__file__)) + os.path.sep + "cache" + os.path.sep
 
+COMBINED_FILE = CACHE_FOLDER + "pygowave_client_combined.js"
+
+MANIFEST_FILE = CACHE_FOLDER + "manifest.json"
+
+# If True, scripts are never compiled on request; run "manage.py buildclient"
+# after each deployment instead
+PRECOMPILED = getattr(django_settings, "CLIENT_PRECOMPILED", False)
+
+# If True, scripts are minified (files built by "manage.py buildclient" are
+# written next to the compiled scripts with a .min.js extension)
+MINIFY = getattr(django_settings, "CLIENT_MINIFY", False)
+
+# If True, the script_links template tag emits a single script tag for the
+# combined script instead of one per module
+COMBINED = getattr(django_settings, "CLIENT_COMBINED", False)
+
+# Offload precompiled scripts to the web server: None (stream them),
+# "x-sendfile" (Apache mod_xsendfile, lighttpd) or "x-accel-redirect" (nginx;
+# SENDFILE_URL must be an internal location mapped to CACHE_FOLDER)
+SENDFILE = getattr(django_settings, "CLIENT_SENDFILE", None)
+SENDFILE_URL = getattr(django_settings, "CLIENT_SENDFILE_URL", "/internal/pygowave_client/")
+
 RFC_1123_DATETIME = "%a, %d %b %Y %H:%M:%S GMT"
 
+# Seconds between checks whether a cached asset's sources changed
+ASSET_CHECK_INTERVAL = getattr(django_settings, "CLIENT_ASSET_CHECK_INTERVAL", 2)
+
+# Cache lifetime for versioned asset URLs (one year)
+ASSET_MAX_AGE = 31536000
+
+# Number of hex digits of the content hash used as asset version
+ASSET_VERSION_LENGTH = 12
+
 PARSE_ERROR_MESSAGE = """alert("PyCow: Error while parsing '%s':\\n\\n%s");"""
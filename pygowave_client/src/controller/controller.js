@@ -69,7 +69,9 @@ pygowave.controller = $defined(pygowave.controller) ? pygowave.controller : new
 			initialWavelet: "",
 			viewerId: "",
 			
-			waveOverviewUrl: "about:blank"
+			waveOverviewUrl: "about:blank",
+			
+			syncSliceTime: 10
 		},
 		
 		// --- Event documentation ---
@@ -146,7 +148,7 @@ pygowave.controller = $defined(pygowave.controller) ? pygowave.controller : new
 							exclusive: true
 						}
 					);
-					this.sendJson(wavelet_id, {"type": "WAVELET_OPEN"});
+					this.sendJson(wavelet_id, {"type": "WAVELET_OPEN", "property": {"checksums": pygowave.model.CHECKSUM_ALGORITHMS}});
 				}
 			});
 		},
@@ -198,7 +200,8 @@ pygowave.controller = $defined(pygowave.controller) ? pygowave.controller : new
 						this.wavelets[wavelet_id] = {
 							model: wave_model.wavelet(wavelet_id),
 							pending: false,
-							blocked: false
+							blocked: false,
+							syncScheduled: false
 						};
 						this._setupOpManagers(wave_id, wavelet_id);
 						this.fireEvent("waveletOpened", [wave_id, wavelet_id]);
@@ -482,7 +485,7 @@ pygowave.controller = $defined(pygowave.controller) ? pygowave.controller : new
 				// Set version and checkup
 				wavelet.options.version = version;
 				if (!this.hasPendingOperations(wavelet.id()))
-					wavelet.checkSync(blipsums);
+					this._checkSync(wavelet, blipsums);
 			}
 			else { // ACK message
 				$clear(this._pendingTimer);
@@ -493,11 +496,65 @@ pygowave.controller = $defined(pygowave.controller) ? pygowave.controller : new
 					this._transferOperations(wavelet.id()); // Send cached
 				else {
 					// All done, we can do a check-up
-					wavelet.checkSync(blipsums);
+					this._checkSync(wavelet, blipsums);
 					this.wavelets[wavelet.id()].pending = false;
 				}
 			}
 		},
+		/**
+		 * Compare the wavelet to the server's checksums. Blips which have
+		 * changed since their last check are verified later, in slices of
+		 * at most syncSliceTime milliseconds while the browser is idle.
+		 *
+		 * @function {private} _checkSync
+		 * @param {pygowave.model.Wavelet} wavelet Wavelet model
+		 * @param {Object} blipsums Checksums to compare the wavelet to
+		 */
+		_checkSync: function (wavelet, blipsums) {
+			if (wavelet.checkSync(blipsums))
+				this._scheduleSync(wavelet);
+		},
+		/**
+		 * Schedule the verification of queued Blips.
+		 *
+		 * @function {private} _scheduleSync
+		 * @param {pygowave.model.Wavelet} wavelet Wavelet model
+		 */
+		_scheduleSync: function (wavelet) {
+			var wobj = this.wavelets[wavelet.id()];
+			if (wobj.syncScheduled)
+				return;
+			wobj.syncScheduled = true;
+			var self = this;
+			var fn = function (deadline) {
+				self._runSync(wavelet, deadline);
+			};
+			if ($defined(window.requestIdleCallback))
+				window.requestIdleCallback(fn, {timeout: 1000});
+			else
+				fn.delay(50);
+		},
+		/**
+		 * Verify queued Blips until the idle period (or time slice) is over;
+		 * reschedule if Blips remain.
+		 *
+		 * @function {private} _runSync
+		 * @param {pygowave.model.Wavelet} wavelet Wavelet model
+		 * @param {optional Object} deadline IdleDeadline, if called by
+		 *        requestIdleCallback
+		 */
+		_runSync: function (wavelet, deadline) {
+			if (!this.wavelets.has(wavelet.id()))
+				return; // Wavelet has been closed
+			this.wavelets[wavelet.id()].syncScheduled = false;
+			var start = $time();
+			while (wavelet.verifySync(1)) {
+				if ($defined(deadline) ? deadline.timeRemaining() < 1 : $time() - start >= this.options.syncSliceTime) {
+					this._scheduleSync(wavelet);
+					return;
+				}
+			}
+		},
 		/**
 		 * Callback from view if it goes ready.
 		 *
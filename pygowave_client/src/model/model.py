@@ -25,8 +25,12 @@ from pycow.decorators import Class, Implements
 from pycow.utils import Events, Options, Hash
 
 from hashlib import sha1 as sha_constructor
+from checksums import crc32_constructor
 
-__all__ = ["WaveModel", "Participant", "ELEMENT_TYPE"]
+__all__ = ["WaveModel", "Participant", "ELEMENT_TYPE", "CHECKSUM_ALGORITHMS"]
+
+# Checksum algorithms offered to the server, fastest first
+CHECKSUM_ALGORITHMS = ["crc32", "sha1"]
 
 @Implements(Options, Events)
 @Class
@@ -327,6 +331,8 @@ class Element(object):
 		
 		@function {public int} position
 		"""
+		if self._blip != None:
+			self._blip._flushShift()
 		return self._pos
 	
 	def setPosition(self, pos):
@@ -336,6 +342,8 @@ class Element(object):
 		@function {public} setPosition
 		@param {int} pos New position
 		"""
+		if self._blip != None:
+			self._blip._flushShift()
 		self._pos = pos
 
 	@staticmethod
@@ -537,13 +545,20 @@ class Blip(object):
 		self._parent = parent
 		
 		self._content = content
-		self._elements = elements
-		for element in self._elements:
+		
+		# Elements are sorted by position. Shifting them is deferred: all
+		# elements from list index _shiftStart on must be moved by _shiftBy.
+		self._elements = []
+		self._shiftStart = 0
+		self._shiftBy = 0
+		for element in elements:
 			element.setBlip(self)
+			self._elements.insert(self._elementIndex(element._pos), element)
 		
 		self._annotations = []
 		
 		self._outofsync = False
+		self._verifiedSum = None
 	
 	def id(self):
 		"""
@@ -568,6 +583,83 @@ class Blip(object):
 		"""
 		return self.options["is_root"]
 
+	def _positionAt(self, i):
+		"""
+		Returns the position of the i-th element, including a deferred shift.
+		
+		@function {private int} _positionAt
+		@param {int} i Index in the element list
+		"""
+		if i >= self._shiftStart:
+			return self._elements[i]._pos + self._shiftBy
+		return self._elements[i]._pos
+	
+	def _elementIndex(self, index):
+		"""
+		Returns the list index of the first element at or after the given
+		position (binary search).
+		
+		@function {private int} _elementIndex
+		@param {int} index Position in the Blip's content
+		"""
+		# Descending powers of two instead of halving an interval, which
+		# keeps to operators that translate directly to JavaScript
+		n = len(self._elements)
+		steps = []
+		step = 1
+		while step <= n:
+			steps.append(step)
+			step += step
+		lo = 0
+		while len(steps) > 0:
+			step = steps.pop()
+			if lo + step <= n and self._positionAt(lo + step - 1) < index:
+				lo += step
+		return lo
+	
+	def _shiftElements(self, start, delta):
+		"""
+		Move all elements from the given list index on by `delta`. Only the
+		elements between this and the last shifted list index are updated;
+		the rest of the shift is deferred, so repeated edits at the same
+		place do not touch every element.
+		
+		@function {private} _shiftElements
+		@param {int} start Index in the element list
+		@param {int} delta Distance to move the elements
+		"""
+		if delta == 0 or start >= len(self._elements):
+			return
+		if self._shiftBy == 0:
+			self._shiftStart = start
+			self._shiftBy = delta
+		elif start >= self._shiftStart:
+			i = self._shiftStart
+			while i < start:
+				self._elements[i]._pos += self._shiftBy
+				i += 1
+			self._shiftStart = start
+			self._shiftBy += delta
+		else:
+			i = start
+			while i < self._shiftStart:
+				self._elements[i]._pos += delta
+				i += 1
+			self._shiftBy += delta
+	
+	def _flushShift(self):
+		"""
+		Apply a deferred shift to the elements.
+		
+		@function {private} _flushShift
+		"""
+		if self._shiftBy != 0:
+			i = self._shiftStart
+			while i < len(self._elements):
+				self._elements[i]._pos += self._shiftBy
+				i += 1
+			self._shiftBy = 0
+	
 	def elementAt(self, index):
 		"""
 		Returns the Element object at the given position or null.
@@ -576,10 +668,9 @@ class Blip(object):
 		@param {int} index Index of the element to retrieve
 		"""
 		
-		for i in xrange(len(self._elements)):
-			elt = self._elements[i]
-			if elt.position() == index:
-				return elt
+		i = self._elementIndex(index)
+		if i < len(self._elements) and self._positionAt(i) == index:
+			return self._elements[i]
 		
 		return None
 
@@ -593,20 +684,21 @@ class Blip(object):
 		"""
 		
 		lst = []
-		for i in xrange(len(self._elements)):
-			elt = self._elements[i]
-			if elt.position() >= start and elt.position() < end:
-				lst.append(elt)
+		i = self._elementIndex(start)
+		while i < len(self._elements) and self._positionAt(i) < end:
+			lst.append(self._elements[i])
+			i += 1
 		
 		return lst
 
 	def allElements(self):
 		"""
-		Returns all Elements of this Blip.
+		Returns all Elements of this Blip, sorted by position.
 		
 		@function {public Element[]} allElements
 		"""
 		
+		self._flushShift()
 		return self._elements
 
 	def insertText(self, index, text, noevent = False):
@@ -625,15 +717,14 @@ class Blip(object):
 		
 		length = len(text)
 		
-		for elt in self._elements:
-			if elt.position() >= index:
-				elt.setPosition(elt.position() + length)
+		self._shiftElements(self._elementIndex(index), length)
 		
 		for anno in self._annotations:
 			if anno.start() >= index:
 				anno.setStart(anno.start() + length)
 				anno.setEnd(anno.end() + length)
 		
+		self._contentChanged()
 		self._wavelet._setStatus("dirty")
 		if not noevent:
 			self.fireEvent("insertText", [index, text])
@@ -652,15 +743,14 @@ class Blip(object):
 		
 		self._content = self._content[:index] + self._content[index+length:]
 		
-		for elt in self._elements:
-			if elt.position() >= index:
-				elt.setPosition(elt.position() - length)
+		self._shiftElements(self._elementIndex(index), -length)
 		
 		for anno in self._annotations:
 			if anno.start() >= index:
 				anno.setStart(anno.start() - length)
 				anno.setEnd(anno.end() - length)
 		
+		self._contentChanged()
 		self._wavelet._setStatus("dirty")
 		if not noevent:
 			self.fireEvent("deleteText", [index, length])
@@ -684,7 +774,12 @@ class Blip(object):
 			elt = GadgetElement(self, None, index, properties)
 		else:
 			elt = Element(self, None, index, type, properties)
-		self._elements.append(elt)
+		i = self._elementIndex(index)
+		if i < self._shiftStart:
+			self._shiftStart += 1
+		else:
+			elt._pos -= self._shiftBy
+		self._elements.insert(i, elt)
 		
 		self._wavelet._setStatus("dirty")
 		if not noevent:
@@ -701,11 +796,11 @@ class Blip(object):
 		@param {optional Boolean} noevent Set to true if no event should be generated
 		"""
 		
-		for i in xrange(len(self._elements)):
-			elt = self._elements[i]
-			if elt.position() == index:
-				self._elements.pop(i)
-				break
+		i = self._elementIndex(index)
+		if i < len(self._elements) and self._positionAt(i) == index:
+			self._elements.pop(i)
+			if i < self._shiftStart:
+				self._shiftStart -= 1
 		self.deleteText(index, 1, True)
 		if not noevent:
 			self.fireEvent("deleteElement", index)
@@ -720,10 +815,9 @@ class Blip(object):
 		@param {Object} delta Delta to apply to the element
 		"""
 		
-		for elt in self._elements:
-			if elt.position() == index:
-				elt.applyDelta(delta)
-				break
+		elt = self.elementAt(index)
+		if elt != None:
+			elt.applyDelta(delta)
 	
 	def setElementUserpref(self, index, key, value, noevent = False):
 		"""
@@ -736,10 +830,9 @@ class Blip(object):
 		@param {optional Boolean} noevent Set to true if no event should be generated
 		"""
 		
-		for elt in self._elements:
-			if elt.position() == index:
-				elt.setUserPref(key, value, noevent)
-				break
+		elt = self.elementAt(index)
+		if elt != None:
+			elt.setUserPref(key, value, noevent)
 
 	def content(self):
 		"""
@@ -748,26 +841,66 @@ class Blip(object):
 		"""
 		return self._content
 	
+	def _contentChanged(self):
+		"""
+		Forget the last verified checksum and withdraw a pending verification
+		after the content has changed.
+		
+		@function {private} _contentChanged
+		"""
+		self._verifiedSum = None
+		self._wavelet._discardSync(self._id)
+	
+	def isVerified(self, sum):
+		"""
+		Returns true if the content has not changed since the last
+		successful {@link pygowave.model.Blip.checkSync checkSync} and the
+		given checksum is the verified one, i.e. checking it does not
+		require a checksum calculation.
+		
+		@function {public Boolean} isVerified
+		@param {String} sum Checksum to look up
+		"""
+		return not self._outofsync and self._verifiedSum == sum
+	
+	def _checksum(self, sum):
+		"""
+		Calculate the checksum of this Blip in the format of `sum`, i.e.
+		CRC-32 if it is prefixed with "crc32:", SHA-1 otherwise.
+		
+		@function {private String} _checksum
+		@param {String} sum Checksum which determines the algorithm
+		"""
+		data = self._content.encode("utf-8")
+		if sum.startswith("crc32:"):
+			return "crc32:" + crc32_constructor(data).hexdigest()
+		return sha_constructor(data).hexdigest()
+	
 	def checkSync(self, sum):
 		"""
 		Calculate a checksum of this Blip and compare it against the given
 		checksum. Fires {@link pygowave.model.Blip.onOutOfSync onOutOfSync} if
 		the checksum is wrong. Returns true if the checksum is ok.
+		If the content has not changed since the last successful check, the
+		checksum is compared to the verified one instead of calculating it.
 		
-		Note: Currently this only calculates the SHA-1 of the Blip's text. This
-		is tentative and subject to change
+		The algorithm is chosen by the format of the checksum (see
+		{@link pygowave.model.CHECKSUM_ALGORITHMS CHECKSUM_ALGORITHMS}).
 		
 		@function {public Boolean} checkSync
 		@param {String} sum Input checksum to compare against
 		"""
 		if self._outofsync:
 			return False
-		mysum = sha_constructor(self._content.encode("utf-8")).hexdigest()
+		if self._verifiedSum == sum:
+			return True
+		mysum = self._checksum(sum)
 		if mysum != sum:
 			self.fireEvent("outOfSync")
 			self._outofsync = True
 			return False
 		else:
+			self._verifiedSum = mysum
 			return True
 
 @Implements(Options, Events)
@@ -839,6 +972,12 @@ class Wavelet(object):
 		self._participants = Hash()
 		self._blips = []
 		self._rootBlip = None
+		
+		# Blips waiting for verification (see checkSync and verifySync)
+		self._syncQueue = []
+		self._syncSums = Hash()
+		self._syncValid = True
+		self._syncStale = False
 	
 	def isRoot(self):
 		"""
@@ -1009,23 +1148,92 @@ class Wavelet(object):
 	
 	def checkSync(self, blipsums):
 		"""
-		Calculate and compare checksums of all Blips to the given map.
+		Compare the checksums of all Blips to the given map.
+		Blips which have not changed since their last verification are
+		checked immediately. The others are queued; call
+		{@link pygowave.model.Wavelet.verifySync verifySync} (e.g. when the
+		browser is idle) to calculate their checksums. Queued checksums of a
+		Blip are replaced by newer ones and dropped if the Blip changes.
 		Fires {@link pygowave.model.Wavelet.onStatusChange onStatusChange} if
-		the status changes.
+		the status changes after all Blips have been checked.
+		Returns true if Blips have been queued.
 		
-		@function {public} checkSync
+		@function {public Boolean} checkSync
 		@param {Object} blipsums Checksums to compare to
 		"""
-		valid = True
+		self._syncStale = False
 		for blipId, checksum in blipsums.iteritems():
-			blip = self.blipById(blipId);
+			blip = self.blipById(blipId)
 			if blip != None:
-				if not blip.checkSync(checksum):
-					valid = False
-		if valid:
-			self._setStatus("clean")
-		else:
+				if blip.isVerified(checksum):
+					if not blip.checkSync(checksum):
+						self._syncValid = False
+				else:
+					if self._syncIndex(blipId) == -1:
+						self._syncQueue.append(blipId)
+					self._syncSums.set(blipId, checksum)
+		if len(self._syncQueue) == 0:
+			self._finishSync()
+			return False
+		return True
+	
+	def verifySync(self, count):
+		"""
+		Check up to `count` queued Blips. Returns true if Blips remain in the
+		queue.
+		
+		@function {public Boolean} verifySync
+		@param {int} count Maximum number of Blips to check
+		"""
+		while count > 0 and len(self._syncQueue) > 0:
+			blipId = self._syncQueue.pop(0)
+			blip = self.blipById(blipId)
+			if blip != None:
+				if not blip.checkSync(self._syncSums.get(blipId)):
+					self._syncValid = False
+			count -= 1
+		if len(self._syncQueue) == 0:
+			self._finishSync()
+			return False
+		return True
+	
+	def _syncIndex(self, blipId):
+		"""
+		Returns the index of the Blip in the verification queue or -1.
+		
+		@function {private int} _syncIndex
+		@param {String} blipId ID of the Blip
+		"""
+		for i in xrange(len(self._syncQueue)):
+			if self._syncQueue[i] == blipId:
+				return i
+		return -1
+	
+	def _discardSync(self, blipId):
+		"""
+		Called by a Blip if its content changes. A queued checksum does not
+		match the content anymore, so it is dropped; the status will not be
+		set to 'clean' until new checksums arrive.
+		
+		@function {private} _discardSync
+		@param {String} blipId ID of the Blip
+		"""
+		i = self._syncIndex(blipId)
+		if i != -1:
+			self._syncQueue.pop(i)
+		self._syncStale = True
+	
+	def _finishSync(self):
+		"""
+		Set the status after all queued Blips have been checked.
+		
+		@function {private} _finishSync
+		"""
+		if not self._syncValid:
 			self._setStatus("invalid")
+		elif not self._syncStale:
+			self._setStatus("clean")
+		self._syncValid = True
 	
 	def applyOperations(self, ops):
 		"""
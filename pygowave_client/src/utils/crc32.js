@@ -0,0 +1,115 @@
+/*
+ * PyGoWave Client Script a.k.a. Microwave
+ * Copyright (C) 2009 by p2k
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *
+ */
+
+/**@scope pygowave*/
+window.pygowave = $defined(window.pygowave) ? window.pygowave : new Hash();
+
+pygowave.utils = $defined(pygowave.utils) ? pygowave.utils : new Hash();
+
+/**
+ * Utility classes and functions.
+ *
+ * @module pygowave.view.utils
+ */
+(function () {
+
+	/**
+	 * Lookup table of the CRC-32 polynomial (0xEDB88320, as used by zlib).
+	 *
+	 * @var {private int[]} table
+	 */
+	var table = new Array(256);
+	for (var n = 0; n < 256; n++) {
+		var c = n;
+		for (var k = 0; k < 8; k++)
+			c = (c & 1) ? (0xEDB88320 ^ (c >>> 1)) : (c >>> 1);
+		table[n] = c;
+	}
+
+	/**
+	 * CRC-32 checksum with the interface of the sha1 class. Much faster
+	 * than SHA-1 and sufficient for detecting out-of-sync Blips.
+	 *
+	 * @class {public} pygowave.utils.crc32
+	 */
+	var crc32 = new Class({
+		/**
+		 * Called on instantiation.
+		 * @constructor {public} initialize
+		 * @param {optional String} initial Initial string to checksum
+		 */
+		initialize: function (initial) {
+			this.digest_size = 4;
+			this.crc = 0;
+			if ($defined(initial))
+				this.update(initial);
+		},
+
+		/**
+		 * Update the checksum with the string arg, which must only contain
+		 * characters in the range 0-255 (e.g. UTF-8 encoded). Repeated calls
+		 * are equivalent to a single call with the concatenation of all the
+		 * arguments.
+		 *
+		 * @function {public} update
+		 * @param {String} arg
+		 */
+		update: function (arg) {
+			var c = this.crc ^ 0xFFFFFFFF;
+			for (var i = 0; i < arg.length; i++)
+				c = table[(c ^ arg.charCodeAt(i)) & 0xFF] ^ (c >>> 8);
+			this.crc = (c ^ 0xFFFFFFFF) >>> 0;
+		},
+
+		/**
+		 * Return the checksum as a string of 8 hexadecimal digits.
+		 *
+		 * @function {public} hexdigest
+		 */
+		hexdigest: function () {
+			var hex = this.crc.toString(16);
+			while (hex.length < 8)
+				hex = "0" + hex;
+			return hex;
+		},
+
+		/**
+		 * Return a copy of the checksum object.
+		 *
+		 * @function {public} copy
+		 */
+		copy: function () {
+			var cp = new crc32();
+			cp.crc = this.crc;
+			return cp;
+		}
+	});
+
+	/**
+	 * Global helper function for pycow compatibility.
+	 * @function {public} crc32_constructor
+	 * @param {optional String} initial Initial string to checksum
+	 */
+	window.crc32_constructor = function (initial) {
+		return new crc32(initial);
+	};
+
+	pygowave.utils.extend({
+		crc32: crc32
+	});
+})();
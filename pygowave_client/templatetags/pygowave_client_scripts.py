@@ -20,14 +20,30 @@ from django.template import Library
 from django.conf import settings
 from django.core.urlresolvers import reverse
 
-from pygowave_client.settings import STATIC_LOAD_ORDER
+from pygowave_client.settings import STATIC_LOAD_ORDER, COMBINED
+from pygowave_client.views import script_version
 
 register = Library()
 
+def versioned_url(url, version):
+	if version == None:
+		return url
+	return "%s?v=%s" % (url, version)
+
 @register.simple_tag
 def script_links():
+	"""
+	Emit script tags for all client scripts (or the combined script if
+	CLIENT_COMBINED is set). The URLs carry the content version of each
+	script, so browsers may cache them forever.
+	
+	"""
+	if COMBINED:
+		url = versioned_url(reverse("pygowave_client.views.view_combined"), script_version())
+		return '\t<script type="text/javascript" src="%s"></script>\n' % (url)
 	out = ""
 	for package, modules in STATIC_LOAD_ORDER:
 		for module in modules:
-			out += '\t<script type="text/javascript" src="%s"></script>\n' % (reverse("pygowave_client.views.view_module", args=(package, module)))
+			url = versioned_url(reverse("pygowave_client.views.view_module", args=(package, module)), script_version(package, module))
+			out += '\t<script type="text/javascript" src="%s"></script>\n' % (url)
 	return out
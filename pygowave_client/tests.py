@@ -0,0 +1,172 @@
+
+#
+# PyGoWave Server - The Python Google Wave Server
+# Copyright 2009 Patrick Schneider <patrick.p2k.schneider@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from pygowave_client.minify import strip
+from pygowave_client.assets import AssetCache
+from pygowave_client import build
+
+from datetime import datetime
+import unittest, threading, random, tempfile, shutil, os, sys
+
+# The client model is written for PyCow; it runs unchanged in Python with
+# the shims from pygowave_server.common on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "pygowave_server", "common"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src", "model"))
+from model import Blip, Element
+
+class MinifyTest(unittest.TestCase):
+	"""
+	Whitespace must be kept where removing it would merge two tokens.
+	
+	"""
+	
+	def test_division_before_regex(self):
+		self.assertEqual(strip('var a = b / /x/.exec(c).length;\n'), 'var a=b/ /x/.exec(c).length;\n')
+	
+	def test_unary_operators(self):
+		self.assertEqual(strip('a = b + +c - -d;\n'), 'a=b+ +c- -d;\n')
+	
+	def test_regex_before_keyword(self):
+		self.assertEqual(strip('x = /a/ instanceof RegExp;\n'), 'x=/a/ instanceof RegExp;\n')
+	
+	def test_division(self):
+		self.assertEqual(strip('a = b / c;\n'), 'a=b/c;\n')
+
+class AssetCacheTest(unittest.TestCase):
+	"""
+	Loading one asset must not block requests for other assets.
+	
+	"""
+	
+	def test_independent_keys(self):
+		cache = AssetCache(check_interval=60)
+		cache.get("cached", lambda: 1, lambda: ("cached", datetime.now()))
+		
+		loading = threading.Event()
+		release = threading.Event()
+		def slow_load():
+			loading.set()
+			release.wait(10)
+			return "slow", datetime.now()
+		thread = threading.Thread(target=cache.get, args=("slow", lambda: 1, slow_load))
+		thread.setDaemon(True)
+		thread.start()
+		loading.wait(10)
+		
+		results = []
+		def other():
+			results.append(cache.get("cached", lambda: 1, None).data)
+			results.append(cache.get("missing", lambda: 1, lambda: ("missing", datetime.now())).data)
+		other_thread = threading.Thread(target=other)
+		other_thread.setDaemon(True)
+		other_thread.start()
+		other_thread.join(2)
+		blocked = other_thread.isAlive()
+		
+		release.set()
+		thread.join(10)
+		other_thread.join(10)
+		self.assertFalse(blocked)
+		self.assertEqual(results, ["cached", "missing"])
+		self.assertEqual(cache.get("slow", lambda: 1, None).data, "slow")
+
+class CompileTest(unittest.TestCase):
+	"""
+	JavaScript modules are symlinked into a fresh cache folder, even if
+	the first temporary name is taken.
+	
+	"""
+	
+	def setUp(self):
+		self.cache_folder = build.CACHE_FOLDER
+		self.urandom = os.urandom
+		self.tmpdir = tempfile.mkdtemp()
+		build.CACHE_FOLDER = os.path.join(self.tmpdir, "cache") + os.path.sep
+	
+	def tearDown(self):
+		build.CACHE_FOLDER = self.cache_folder
+		os.urandom = self.urandom
+		shutil.rmtree(self.tmpdir)
+	
+	def test_symlink(self):
+		if os.name != "posix":
+			return
+		srcfile, cachefile, namespace = build.module_files("utils", "crc32")
+		package_folder = os.path.dirname(cachefile)
+		os.makedirs(package_folder)
+		taken = os.path.join(package_folder, ".tmp%d.%s" % (os.getpid(), "\0\0\0\0".encode("hex")))
+		open(taken, "w").close()
+		suffixes = ["\0\0\0\0", "\0\0\0\1"]
+		os.urandom = lambda n: suffixes.pop(0)
+		
+		self.assertEqual(build.compile_and_cache(srcfile, cachefile, "utils", namespace)[0], "changed")
+		self.assertEqual(os.path.realpath(cachefile), os.path.realpath(srcfile + ".js"))
+		self.assertEqual(sorted(os.listdir(package_folder)), [os.path.basename(taken), "crc32.js", "crc32.js.lock"])
+		self.assertEqual(suffixes, [])
+
+class DummyWavelet(object):
+	def _setStatus(self, status):
+		pass
+	
+	def _discardSync(self, blipId):
+		pass
+
+class BlipElementsTest(unittest.TestCase):
+	"""
+	Element positions of a Blip must follow text and element edits like a
+	plain sorted list of positions would.
+	
+	"""
+	
+	def test_random_edits(self):
+		rnd = random.Random(3)
+		for round in xrange(300):
+			content = "a" * rnd.randint(0, 50)
+			positions = sorted(rnd.sample(xrange(len(content) + 1), rnd.randint(0, min(len(content) + 1, 8))))
+			blip = Blip(DummyWavelet(), "b", {}, content, [Element(None, None, p, 1, {}) for p in reversed(positions)])
+			for step in xrange(60):
+				r = rnd.random()
+				n = len(blip.content())
+				if r < 0.35:
+					i = rnd.randint(0, n)
+					text = "x" * rnd.randint(1, 3)
+					blip.insertText(i, text)
+					positions = [p + len(text) if p >= i else p for p in positions]
+				elif r < 0.6 and n > 0:
+					i = rnd.randint(0, n - 1)
+					length = rnd.randint(1, n - i)
+					if [p for p in positions if i <= p < i + length]:
+						continue # The editor never deletes elements as text
+					blip.deleteText(i, length)
+					positions = [p - length if p >= i else p for p in positions]
+				elif r < 0.75:
+					i = rnd.randint(0, n)
+					blip.insertElement(i, 1, {})
+					positions = sorted([p + 1 if p >= i else p for p in positions] + [i])
+				elif r < 0.85 and positions:
+					i = rnd.choice(positions)
+					blip.deleteElement(i)
+					positions.remove(i)
+					positions = [p - 1 if p >= i else p for p in positions]
+				else:
+					for k in xrange(n + 1):
+						self.assertEqual(blip.elementAt(k) != None, k in positions)
+					a = rnd.randint(0, n)
+					b = rnd.randint(a, n + 1)
+					self.assertEqual([e.position() for e in blip.elementsWithin(a, b)], [p for p in positions if a <= p < b])
+			self.assertEqual([e.position() for e in blip.allElements()], positions)
@@ -17,157 +17,175 @@
 #
 
 from django.conf import settings as django_settings
-from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.http import Http404, HttpResponse
 
 from pygowave_client.settings import *
+from pygowave_client.assets import asset_cache, asset_response, accepted_encodings, cache_control, AssetError
+from pygowave_client.fileserve import serve_file
+from pygowave_client.build import module_files, served_file, compile_and_cache, combine_modules, write_atomic, read_manifest
+from pygowave_client.minify import minify, MinifyError
 
-from datetime import datetime, timedelta
-import os, gzip
+from datetime import datetime
+import os, time
 
-def compile_and_cache(srcfile, cachefile, package, namespace):
-	if os.path.exists(srcfile + ".py"):
-		srcfile += ".py"
-		mtime = datetime.utcfromtimestamp(os.path.getmtime(srcfile))
-		if not os.path.exists(cachefile) or os.path.getmtime(srcfile) > os.path.getmtime(cachefile):
-			from pycow import translate_file, ParseError # Import has been placed here, so PyCow is not a dependency
-			if not os.path.exists(CACHE_FOLDER + package):
-				os.mkdir(CACHE_FOLDER + package)
-			try:
-				translate_file(srcfile, cachefile, namespace=namespace, warnings=False)
-				return ("changed", mtime)
-			except ParseError, e:
-				os.unlink(cachefile)
-				return ("error", PARSE_ERROR_MESSAGE % (srcfile, e.value))
-	elif os.path.exists(srcfile + ".js"):
-		srcfile += ".js"
-		mtime = datetime.utcfromtimestamp(os.path.getmtime(srcfile))
-		if not os.path.exists(cachefile) or os.path.getmtime(srcfile) > os.path.getmtime(cachefile):
-			if not os.path.exists(CACHE_FOLDER + package):
-				os.mkdir(CACHE_FOLDER + package)
-			# Just symlink/copy for now; TODO: offer minification
-			if os.name == "posix":
-				target = os.path.relpath(srcfile, os.path.dirname(cachefile))
-				os.symlink(target, cachefile)
-			else:
-				open(cachefile, 'w').write(open(srcfile, 'r').read())
-			return ("changed", mtime)
-	else:
-		raise Http404
-	return ("unchanged", mtime)
+_manifest = {"checked": 0, "mtime": None, "data": None}
 
-def view_module(request, package, module):
+def precompiled_response(request, cachefile, version):
 	"""
-	Return the requested JavaScript module, converts files with .py ending via
-	PyCow and caches results. Supports If-Modified-Since and gzip compression.
+	Serve a script built by "manage.py buildclient" (or its precompressed
+	variant) from disk.
 	
 	"""
+	filename = served_file(cachefile)
+	encoding = None
+	accepted = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+	for coding, extension in (("br", ".br"), ("gzip", ".gz")):
+		if coding in accepted and os.path.exists(filename + extension):
+			filename += extension
+			encoding = coding
+			break
 	
-	namespace = "pygowave.%s" % (package)
-	module = package + os.path.sep + module
-	cachefile = CACHE_FOLDER + module + ".js"
-	srcfile = SRC_FOLDER + module
-	
-	result, mtime = compile_and_cache(srcfile, cachefile, package, namespace)
-	
-	if result == "error":
-		return HttpResponse(mtime, mimetype="text/javascript")
+	response = serve_file(request, filename, "text/javascript", encoding, cache_control(request, version))
+	response["Vary"] = "Accept-Encoding"
+	return response
+
+def load_script(cachefile):
+	"""
+	Return the contents and modification time of a compiled script,
+	minified in memory if MINIFY is set.
 	
-	# Handle If-Modified-Since
-	if request.META.has_key("HTTP_IF_MODIFIED_SINCE"):
+	"""
+	f = open(cachefile, "r")
+	try:
+		data = f.read()
+	finally:
+		f.close()
+	if MINIFY:
 		try:
-			mstime = datetime.strptime(request.META["HTTP_IF_MODIFIED_SINCE"], RFC_1123_DATETIME)
-			if mtime <= mstime:
-				return HttpResponseNotModified()
-		except ValueError:
-			pass
-	
-	response = HttpResponse(mimetype="text/javascript")
-	response["Last-Modified"] = mtime.strftime(RFC_1123_DATETIME)
-	
-	# Support for gzip
-	if "gzip" in request.META["HTTP_ACCEPT_ENCODING"].split(","):
-		if not os.path.exists(cachefile + ".gz") or os.path.getmtime(cachefile) > os.path.getmtime(cachefile + ".gz"):
-			gzip.open(cachefile + ".gz", 'wb').write(open(cachefile, 'r').read())
-		cachefile = cachefile + ".gz"
-		response["Content-Encoding"] = "gzip"
-
-	response.write(open(cachefile, "r").read())
+			data = minify(data)
+		except MinifyError:
+			pass # Serve the script as it is
+	return data, datetime.utcfromtimestamp(os.path.getmtime(cachefile))
 
-	return response
+def module_asset(package, module):
+	"""
+	Return the Asset of a single module, compiling it if the source changed.
+	Raises AssetError if compilation failed.
+	
+	"""
+	
+	srcfile, cachefile, namespace = module_files(package, module)
+	
+	def validate():
+		result, mtime = compile_and_cache(srcfile, cachefile, package, namespace)
+		if result == "error":
+			raise AssetError(mtime)
+		return mtime
+	
+	def load():
+		return load_script(cachefile)
+	
+	return asset_cache.get(package + os.path.sep + module, validate, load)
 
-def view_combined(request):
+def combined_asset():
 	"""
-	Return a concatenation of all pygowave_client scripts.
+	Return the Asset of the combined script, recompiling and recombining
+	modules whose source changed. Raises AssetError if compilation failed.
 	
 	"""
 	
-	# Compile all
-	changed = False
-	for package, modules in STATIC_LOAD_ORDER:
-		for module in modules:
-			namespace = "pygowave.%s" % (package)
-			module = package + os.path.sep + module
-			cachefile = CACHE_FOLDER + module + ".js"
-			srcfile = SRC_FOLDER + module
-			
-			result, mtime = compile_and_cache(srcfile, cachefile, package, namespace)
-			
-			if result == "error":
-				return HttpResponse(mtime, mimetype="text/javascript")
-			elif result == "changed":
-				changed = True
-	
-	cachefile = CACHE_FOLDER + "pygowave_client_combined.js"
-	
-	# Combine
-	if changed or not os.path.exists(cachefile):
-		cf = open(cachefile, 'w')
-		first = True
+	cachefile = COMBINED_FILE
+	
+	def validate():
+		changed = False
+		mtimes = []
 		for package, modules in STATIC_LOAD_ORDER:
 			for module in modules:
-				modulecachefile = CACHE_FOLDER + package + os.path.sep + module + ".js"
-				mcf = open(modulecachefile, 'r')
-				infoline = "/* --- pygowave.%s.%s --- */\n\n" % (package, module)
-				if first:
-					first = False
-					# Leave license information; stop after it
-					line = mcf.readline()
-					while (line.startswith("/*") and not line.startswith("/**")) or line.startswith(" *") or line == "\n":
-						cf.write(line)
-						line = mcf.readline()
-					cf.write(infoline)
-					cf.write(line)
-				else:
-					# Strip license information
-					line = mcf.readline()
-					while (line.startswith("/*") and not line.startswith("/**")) or line.startswith(" *") or line == "\n":
-						line = mcf.readline()
-					cf.write("\n" + infoline)
-					cf.write(line)
-				cf.write(mcf.read())
-				mcf.close()
-		cf.close()
-	
-	# Handle If-Modified-Since
-	mtime = datetime.utcfromtimestamp(os.path.getmtime(cachefile))
-	if request.META.has_key("HTTP_IF_MODIFIED_SINCE"):
+				srcfile, modulecachefile, namespace = module_files(package, module)
+				result, mtime = compile_and_cache(srcfile, modulecachefile, package, namespace)
+				if result == "error":
+					raise AssetError(mtime)
+				elif result == "changed":
+					changed = True
+				mtimes.append(mtime)
+		if changed or not os.path.exists(cachefile):
+			write_atomic(cachefile, combine_modules())
+		return tuple(mtimes)
+	
+	def load():
+		return load_script(cachefile)
+	
+	return asset_cache.get("pygowave_client_combined", validate, load)
+
+def manifest():
+	"""
+	Return the manifest written by "manage.py buildclient" or None. The file
+	is checked for changes every ASSET_CHECK_INTERVAL seconds.
+	
+	"""
+	now = time.time()
+	if now - _manifest["checked"] >= ASSET_CHECK_INTERVAL:
 		try:
-			mstime = datetime.strptime(request.META["HTTP_IF_MODIFIED_SINCE"], RFC_1123_DATETIME)
-			if mtime <= mstime:
-				return HttpResponseNotModified()
-		except ValueError:
-			pass
+			mtime = os.path.getmtime(MANIFEST_FILE)
+		except OSError:
+			mtime = None
+		if mtime != _manifest["mtime"]:
+			_manifest["data"] = read_manifest()
+			_manifest["mtime"] = mtime
+		_manifest["checked"] = now
+	return _manifest["data"]
 
-	response = HttpResponse(mimetype="text/javascript")
-	response["Last-Modified"] = mtime.strftime(RFC_1123_DATETIME)
+def script_version(package=None, module=None):
+	"""
+	Return the content version of a module or, if `package` is None, of the
+	combined script. Returns None if the version is unknown.
+	
+	"""
+	if PRECOMPILED:
+		data = manifest()
+		if data == None:
+			return None
+		if package == None:
+			return data.get("combined", None)
+		return data["modules"].get("%s/%s" % (package, module), None)
+	
+	try:
+		if package == None:
+			return combined_asset().version
+		return module_asset(package, module).version
+	except AssetError:
+		return None
 
-	# Support for gzip
-	if "gzip" in request.META["HTTP_ACCEPT_ENCODING"].split(","):
-		if not os.path.exists(cachefile + ".gz") or os.path.getmtime(cachefile) > os.path.getmtime(cachefile + ".gz"):
-			gzip.open(cachefile + ".gz", 'wb').write(open(cachefile, 'r').read())
-		cachefile = cachefile + ".gz"
-		response["Content-Encoding"] = "gzip"
-	
-	response.write(open(cachefile, "r").read())
+def view_module(request, package, module):
+	"""
+	Return the requested JavaScript module, converts files with .py ending via
+	PyCow and caches results in memory. Precompiled modules are served from
+	disk. Supports conditional requests and gzip compression.
+	
+	"""
+	
+	if PRECOMPILED:
+		return precompiled_response(request, module_files(package, module)[1], script_version(package, module))
+	
+	try:
+		asset = module_asset(package, module)
+	except AssetError, e:
+		return HttpResponse(e.args[0], mimetype="text/javascript")
+	
+	return asset_response(request, asset)
 
-	return response
+def view_combined(request):
+	"""
+	Return a concatenation of all pygowave_client scripts.
+	
+	"""
+	
+	if PRECOMPILED:
+		return precompiled_response(request, COMBINED_FILE, script_version())
+	
+	try:
+		asset = combined_asset()
+	except AssetError, e:
+		return HttpResponse(e.args[0], mimetype="text/javascript")
+	
+	return asset_response(request, asset)
@@ -0,0 +1,81 @@
+
+#
+# PyGoWave Server - The Python Google Wave Server
+# Copyright 2009 Patrick Schneider <patrick.p2k.schneider@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Checksums of Blip contents, used by server and client to detect if a Blip
+has gone out of sync.
+
+SHA-1 checksums are plain hex digests and understood by every client.
+Other checksums carry the name of their algorithm as prefix (e.g.
+"crc32:1c291ca3"), so a client can always tell how to verify them. The
+client implements the same algorithms in JavaScript (utils/sha1.js and
+utils/crc32.js).
+
+"""
+
+from hashlib import sha1 as sha_constructor
+import zlib
+
+__all__ = ["CHECKSUM_ALGORITHMS", "crc32_constructor", "checksum", "negotiate_checksum"]
+
+# Supported algorithms, fastest first
+CHECKSUM_ALGORITHMS = ("crc32", "sha1")
+
+class crc32_constructor(object):
+	"""
+	CRC-32 (as used by zlib) with the interface of the hashlib objects.
+	
+	"""
+	
+	def __init__(self, initial=None):
+		self.crc = 0
+		if initial != None:
+			self.update(initial)
+	
+	def update(self, data):
+		self.crc = zlib.crc32(data, self.crc)
+	
+	def hexdigest(self):
+		return "%08x" % (self.crc & 0xffffffff)
+	
+	def copy(self):
+		cp = crc32_constructor()
+		cp.crc = self.crc
+		return cp
+
+def checksum(text, algorithm="sha1"):
+	"""
+	Return the checksum of a (unicode) text with the given algorithm.
+	
+	"""
+	data = text.encode("utf-8")
+	if algorithm == "crc32":
+		return "crc32:" + crc32_constructor(data).hexdigest()
+	return sha_constructor(data).hexdigest()
+
+def negotiate_checksum(offered, enabled=CHECKSUM_ALGORITHMS):
+	"""
+	Return the first algorithm in the client's list `offered` which is also
+	`enabled`. Falls back to "sha1".
+	
+	"""
+	if isinstance(offered, (list, tuple)):
+		for algorithm in offered:
+			if algorithm in enabled:
+				return algorithm
+	return "sha1"
@@ -340,6 +340,8 @@ class OpManager(object):
 		empty or it may contain any number of new operations (according to
 		results of deletion, modification and splitting; i.e. the input
 		operation is not modified by itself).
+		Operations on other blips are skipped and the transformation stops
+		as soon as the input operation has been consumed completely.
 		
 		@function {public Operation[]} transform
 		@param {Operation} input_op
@@ -352,116 +354,136 @@ class OpManager(object):
 		# "Complex is better than complicated."
 		
 		i = 0
-		while i < len(self.operations):
+		while i < len(self.operations) and len(op_lst) > 0:
 			myop = self.operations[i]
+			
+			# Do not handle incompatible operations (all ops in op_lst are
+			# clones of input_op, so this only needs to be checked once)
+			if not input_op.isCompatibleTo(myop):
+				i += 1
+				continue
+			
+			# The type of myop does not change while transforming
+			my_delete = myop.isDelete()
+			my_insert = myop.isInsert()
+			my_change = myop.isChange()
+			
 			j = 0
 			while j < len(op_lst):
 				op = op_lst[j]
 				
-				# Do not handle incompatible operations
-				if not op.isCompatibleTo(myop): continue
-				
 				# Check all possible cases
 				
 				end = None
-				if op.isDelete() and myop.isDelete():
-					if op.index < myop.index:
-						end = op.index + op.length()
-						if end <= myop.index:
+				if op.isDelete():
+					if my_delete:
+						if op.index < myop.index:
+							end = op.index + op.length()
+							if end <= myop.index:
+								myop.index -= op.length()
+								self.fireEvent("operationChanged", i)
+							elif end < myop.index + myop.length(): # and end > myop.index
+								op.resize(myop.index - op.index)
+								myop.resize(myop.length() - (end - myop.index))
+								myop.index = op.index
+								self.fireEvent("operationChanged", i)
+							else: # end >= myop.index + myop.length()
+								op.resize(op.length() - myop.length())
+								self.fireEvent("beforeOperationsRemoved", [i, i])
+								self.operations.pop(i)
+								self.fireEvent("afterOperationsRemoved", [i, i])
+								i -= 1
+								break
+						else: # op.index >= myop.index
+							end = myop.index + myop.length()
+							if op.index >= end:
+								op.index -= myop.length()
+							elif op.index + op.length() <= end: # and op.index < end
+								myop.resize(myop.length() - op.length())
+								op_lst.pop(j)
+								j -= 1
+								# Both deleted the same element (which cannot be resized)
+								if myop.isNull() or myop.type == DOCUMENT_ELEMENT_DELETE:
+									self.fireEvent("beforeOperationsRemoved", [i, i])
+									self.operations.pop(i)
+									self.fireEvent("afterOperationsRemoved", [i, i])
+									i -= 1
+									break
+								else:
+									self.fireEvent("operationChanged", i)
+							else: # op.index + op.length() > end
+								myop.resize(myop.length() - (end - op.index))
+								self.fireEvent("operationChanged", i)
+								op.resize(op.length() - (end - op.index))
+								op.index = myop.index
+					
+					elif my_insert:
+						if op.index < myop.index:
+							if op.index + op.length() <= myop.index:
+								myop.index -= op.length()
+								self.fireEvent("operationChanged", i)
+							else: # op.index + op.length() > myop.index
+								new_op = op.clone()
+								op.resize(myop.index - op.index)
+								new_op.resize(new_op.length() - op.length())
+								op_lst.insert(j+1, new_op)
+								myop.index -= op.length()
+								self.fireEvent("operationChanged", i)
+						else: # op.index >= myop.index
+							op.index += myop.length()
+					
+					elif my_change:
+						if myop.index >= op.index + op.length():
 							myop.index -= op.length()
 							self.fireEvent("operationChanged", i)
-						elif end < myop.index + myop.length(): # and end > myop.index
-							op.resize(myop.index - op.index)
-							myop.resize(myop.length() - (end - myop.index))
-							myop.index = op.index
-							self.fireEvent("operationChanged", i)
-						else: # end >= myop.index + myop.length()
-							op.resize(op.length() - myop.length())
+						elif myop.index >= op.index:
+							# The changed element has been deleted
 							self.fireEvent("beforeOperationsRemoved", [i, i])
 							self.operations.pop(i)
 							self.fireEvent("afterOperationsRemoved", [i, i])
 							i -= 1
 							break
-					else: # op.index >= myop.index
-						end = myop.index + myop.length()
-						if op.index >= end:
+				
+				elif op.isInsert():
+					if my_delete:
+						if op.index <= myop.index:
+							myop.index += op.length()
+							self.fireEvent("operationChanged", i)
+						elif op.index >= myop.index + myop.length(): # op.index > myop.index
 							op.index -= myop.length()
-						elif op.index + op.length() <= end: # and op.index < end
-							myop.resize(myop.length() - op.length())
-							op_lst.pop(j)
-							j -= 1
-							if myop.isNull():
-								self.fireEvent("beforeOperationsRemoved", [i, i])
-								self.operations.pop(i)
-								self.fireEvent("afterOperationsRemoved", [i, i])
-								i -= 1
-								break
-							else:
-								self.fireEvent("operationChanged", i)
-						else: # op.index + op.length() > end
-							myop.resize(myop.length() - (end - op.index))
+						else: # op.index < myop.index + myop.length()
+							new_op = myop.clone()
+							myop.resize(op.index - myop.index)
 							self.fireEvent("operationChanged", i)
-							op.resize(op.length() - (end - op.index))
+							new_op.resize(new_op.length() - myop.length())
+							self.fireEvent("beforeOperationsInserted", [i+1, i+1])
+							self.operations.insert(i+1, new_op)
+							self.fireEvent("afterOperationsInserted", [i+1, i+1])
 							op.index = myop.index
-				
-				elif op.isDelete() and myop.isInsert():
-					if op.index < myop.index:
-						if op.index + op.length() <= myop.index:
-							myop.index -= op.length()
+					
+					elif my_insert:
+						if op.index <= myop.index:
+							myop.index += op.length()
 							self.fireEvent("operationChanged", i)
-						else: # op.index + op.length() > myop.index
-							new_op = op.clone()
-							op.resize(myop.index - op.index)
-							new_op.resize(new_op.length() - op.length())
-							op_lst.insert(j+1, new_op)
-							myop.index -= op.length()
+						else: # op.index > myop.index
+							op.index += myop.length()
+					
+					elif my_change:
+						if op.index <= myop.index:
+							myop.index += op.length()
 							self.fireEvent("operationChanged", i)
-					else: # op.index >= myop.index
-						op.index += myop.length()
-				
-				elif op.isInsert() and myop.isDelete():
-					if op.index <= myop.index:
-						myop.index += op.length()
-						self.fireEvent("operationChanged", i)
-					elif op.index >= myop.index + myop.length(): # op.index > myop.index
-						op.index -= myop.length()
-					else: # op.index < myop.index + myop.length()
-						new_op = myop.clone()
-						myop.resize(op.index - myop.index)
-						self.fireEvent("operationChanged", i)
-						new_op.resize(new_op.length() - myop.length())
-						self.fireEvent("beforeOperationsInserted", [i+1, i+1])
-						self.operations.insert(i+1, new_op)
-						self.fireEvent("afterOperationsInserted", [i+1, i+1])
-						op.index = myop.index
 				
-				elif op.isInsert() and myop.isInsert():
-					if op.index <= myop.index:
-						myop.index += op.length()
-						self.fireEvent("operationChanged", i)
-					else: # op.index > myop.index
-						op.index += myop.length()
-				elif op.isChange() and myop.isDelete():
-					if op.index > myop.index:
-						if op.index <= myop.index + myop.length():
-							op.index = myop.index
-						else:
+				elif op.isChange():
+					if my_delete:
+						if op.index >= myop.index + myop.length():
 							op.index -= myop.length()
-				elif op.isChange() and myop.isInsert():
-					if op.index >= myop.index:
-						op.index += myop.length()
-				elif op.isDelete() and myop.isChange():
-					if op.index < myop.index:
-						if myop.index <= op.index + op.length():
-							myop.index = op.index
-							self.fireEvent("operationChanged", i)
-						else:
-							myop.index -= op.length()
-							self.fireEvent("operationChanged", i)
-				elif op.isInsert() and myop.isChange():
-					if op.index <= myop.index:
-						myop.index += op.length()
-						self.fireEvent("operationChanged", i)
+						elif op.index >= myop.index:
+							# The changed element has been deleted
+							op_lst.pop(j)
+							j -= 1
+					elif my_insert:
+						if op.index >= myop.index:
+							op.index += myop.length()
 				
 				j += 1
 				
@@ -531,6 +553,19 @@ class OpManager(object):
 			ops.append(Operation.unserialize(op))
 		
 		self.put(ops)
+	
+	def normalize(self):
+		"""
+		Merge adjacent operations in the manager's operation list like the
+		document methods below do while editing: consecutive insertions and
+		deletions are joined and deletions of freshly inserted text cancel
+		out. The effect of the operations does not change.
+		
+		@function {public} normalize
+		"""
+		ops = self.fetch()
+		for op in ops:
+			self.__insert(op)
 
 	def __insert(self, newop):
 		"""
@@ -547,14 +582,14 @@ class OpManager(object):
 		if newop.type == DOCUMENT_ELEMENT_DELTA:
 			for i in xrange(len(self.operations)):
 				op = self.operations[i]
-				if op.type == DOCUMENT_ELEMENT_DELTA and newop.property["id"] == op.property["id"]:
+				if op.type == DOCUMENT_ELEMENT_DELTA and op.blipId == newop.blipId and newop.property["id"] == op.property["id"]:
 					op.property["delta"].update(newop.property["delta"])
 					self.fireEvent("operationChanged", i)
 					return
 		
 		# Others: Only merge with the last op (otherwise this may get a bit complicated)
 		i = len(self.operations) - 1
-		if i >= 0:
+		if i >= 0 and self.operations[i].blipId == newop.blipId:
 			op = self.operations[i]
 			if newop.type == DOCUMENT_INSERT and op.type == DOCUMENT_INSERT:
 				if newop.index >= op.index and newop.index <= op.index+op.length():
@@ -26,16 +26,26 @@ import copy, re, simplejson
 
 __all__ = ["Events", "Options"]
 
+# Matches the "on" prefix of MooTools event names
+EVENT_NAME_RE = re.compile(r"(?i)^on([A-Z])")
+
+# Intern table of normalized event names (there is only a handful of them)
+_event_names = {}
+
 class Events(object):
+	_events = None # Maps normalized event names to sets of listeners
+	
 	def addEvent(self, type, fn, internal = False):
-		type = Events.removeOn(type)
-		evts = getattr(self, "$events", None)
+		name = _event_names.get(type)
+		if name == None:
+			name = Events.removeOn(type)
+		evts = self._events
 		if evts == None:
 			evts = {}
-			setattr(self, "$events", evts)
-		if not evts.has_key(type):
-			evts[type] = set()
-		evts[type].add(fn)
+			self._events = evts
+		if not evts.has_key(name):
+			evts[name] = set()
+		evts[name].add(fn)
 		if internal: fn.internal = True
 		return self
 
@@ -45,12 +55,17 @@ class Events(object):
 		return self
 
 	def fireEvent(self, type, args = None, delay = None):
-		type = Events.removeOn(type)
-		evts = getattr(self, "$events", None)
-		if evts == None or not evts.has_key(type):
+		evts = self._events
+		if evts == None: # No listeners at all (e.g. on the server)
+			return self
+		name = _event_names.get(type)
+		if name == None:
+			name = Events.removeOn(type)
+		listeners = evts.get(name)
+		if not listeners:
 			return self
 		
-		for fn in evts[type]:
+		for fn in listeners:
 			if isinstance(args, list):
 				fn(*args)
 			elif args != None:
@@ -62,28 +77,36 @@ class Events(object):
 		return self
 
 	def removeEvent(self, type, fn):
-		type = Events.removeOn(type)
-		evts = getattr(self, "$events", None)
-		if evts == None or not evts.has_key(type):
+		evts = self._events
+		if evts == None:
+			return self
+		name = _event_names.get(type)
+		if name == None:
+			name = Events.removeOn(type)
+		if not evts.has_key(name):
 			return self
 		
 		if not getattr(fn, "internal", False):
-			evts[type].remove(fn)
+			evts[name].discard(fn)
 		return self
 
 	def removeEvents(self, type):
-		evts = getattr(self, "$events", None)
+		evts = self._events
 		if evts == None:
 			return self
-		for e in evts.iterkeys():
+		for e in evts.keys():
 			if type != e: continue
-			for fn in evts[e]:
+			for fn in list(evts[e]):
 				self.removeEvent(e, fn)
 		return self
 
 	@staticmethod
 	def removeOn(string):
-		return re.sub(r"(?i)^on([A-Z])", lambda match: match.group(1).lower(), string)
+		name = _event_names.get(string)
+		if name == None:
+			name = EVENT_NAME_RE.sub(lambda match: match.group(1).lower(), string)
+			_event_names[string] = name
+		return name
 
 class Options(object):
 	def setOptions(self, options = {}):
@@ -91,7 +114,7 @@ class Options(object):
 		self.options.update(options)
 		if getattr(self, "addEvent", None): return self
 		for option in self.options.iterkeys():
-			if not isinstance(self.options[option], FunctionType) or not re.match(r"(?i)^on([A-Z])", option): continue
+			if not isinstance(self.options[option], FunctionType) or not EVENT_NAME_RE.match(option): continue
 			self.addEvent(option, self.options[option])
 			del self.options[option]
 		return self
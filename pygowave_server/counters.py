@@ -0,0 +1,108 @@
+
+#
+# PyGoWave Server - The Python Google Wave Server
+# Copyright 2009 Patrick Schneider <patrick.p2k.schneider@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from django.core.cache import cache
+from django.conf import settings
+from django.contrib.auth.models import User
+
+import time
+
+class CachedCounter(object):
+	"""
+	A counter whose value is calculated by a (potentially expensive) function
+	and cached for `ttl` seconds.
+	
+	After expiry the old value is kept for another `ttl` seconds. During that
+	time only one client recalculates the value while all others still get
+	the stale one, so an expiring counter does not trigger a flood of
+	identical queries.
+	
+	"""
+	
+	key_prefix = "pygowave_counter_"
+	lock_timeout = 10
+	
+	def __init__(self, name, func, ttl):
+		self.key = self.key_prefix + name
+		self.func = func
+		self.ttl = ttl
+	
+	def value(self):
+		"""
+		Return the (cached) value of the counter.
+		
+		"""
+		now = time.time()
+		entry = cache.get(self.key)
+		if entry != None:
+			value, expires = entry
+			if now < expires:
+				return value
+			if not cache.add(self.key + "_lock", True, self.lock_timeout):
+				return value # Someone else is already recalculating
+		
+		value = self.func()
+		cache.set(self.key, (value, now + self.ttl), self.ttl * 2)
+		cache.delete(self.key + "_lock")
+		return value
+	
+	def invalidate(self):
+		"""
+		Discard the cached value; the next call will recalculate it.
+		
+		"""
+		cache.delete(self.key)
+
+COUNTERS_CACHE_SECONDS = getattr(settings, "COUNTERS_CACHE_SECONDS", 30)
+
+def count_online():
+	from pygowave_server.models import Participant # Imported here, as pygowave_server.models imports this module
+	return Participant.objects.online_count()
+
+online_counter = CachedCounter("online", count_online, COUNTERS_CACHE_SECONDS)
+users_counter = CachedCounter("users", lambda: User.objects.filter(is_active=True).count(), COUNTERS_CACHE_SECONDS)
+
+def online_count():
+	"""
+	Return the number of online users (cached).
+	
+	"""
+	return online_counter.value()
+
+def users_count():
+	"""
+	Return the number of active users (cached, invalidated on changes).
+	
+	"""
+	return users_counter.value()
+
+def remember_user_active(sender, instance, **kwargs):
+	instance._counted_is_active = instance.is_active
+
+def user_saved(sender, instance, created, **kwargs):
+	"""
+	Invalidate the users counter if a user was added or (de)activated. Other
+	saves (e.g. the last_login update on every login) keep the cached value.
+	
+	"""
+	if created or instance.is_active != getattr(instance, "_counted_is_active", None):
+		users_counter.invalidate()
+	instance._counted_is_active = instance.is_active
+
+def user_deleted(sender, **kwargs):
+	users_counter.invalidate()
@@ -18,11 +18,15 @@
 
 from django.utils.translation import ugettext_lazy as _
 from django.utils import simplejson
+from django.conf import settings
+from django.utils.hashcompat import sha_constructor
 
 from pygowave_server.models import Wave, Wavelet, Blip
+from pygowave_server.utils import LRUCache
+from pygowave_server.fetcher import fetch_service
 
 from lxml import etree
-import urllib2, time
+import urllib2, time, os, copy, threading
 
 class Event:
 	"""
@@ -65,78 +69,300 @@ class Event:
 			"properties": self.properties,
 		}
 
+class GadgetSpecCache(object):
+	"""
+	Caches parsed gadget specifications by URL.
+	
+	Entries are fresh for `fresh_seconds`. After that, they are still served
+	for `stale_seconds` while being revalidated in the background (concurrent
+	revalidations of the same URL are merged by the fetch service); older
+	entries are revalidated before they are returned. Revalidation uses the
+	ETag and Last-Modified headers of the last response.
+	Local files (i.e. hosted gadgets) are checked for a changed mtime on
+	every access instead and parsed directly from disk.
+	
+	At most `max_size` specifications are held; the least recently used
+	one is discarded if the cache is full.
+	
+	"""
+	
+	def __init__(self, max_size=256, fresh_seconds=300, stale_seconds=3600):
+		self.fresh_seconds = fresh_seconds
+		self.stale_seconds = stale_seconds
+		self._entries = LRUCache(max_size)
+		self._lock = threading.Lock()
+	
+	def get(self, url):
+		"""
+		Return the parsed gadget specification (a dictionary) for `url`.
+		Throws the same exceptions as GadgetLoader.
+		
+		"""
+		self._lock.acquire()
+		try:
+			entry = self._entries.get(url)
+		finally:
+			self._lock.release()
+		
+		if url.startswith("file://"):
+			try:
+				mtime = os.path.getmtime(url[7:])
+			except OSError, e:
+				raise urllib2.URLError(e)
+			if entry == None or entry["mtime"] != mtime:
+				entry = self._store(url, {
+					"spec": GadgetLoader.parse_file(url[7:]),
+					"etag": None,
+					"last_modified": None,
+					"mtime": mtime,
+					"fetched": time.time(),
+				})
+			return entry["spec"]
+		
+		if entry != None:
+			age = time.time() - entry["fetched"]
+			if age < self.fresh_seconds:
+				return entry["spec"]
+			elif age < self.fresh_seconds + self.stale_seconds:
+				self._revalidate_async(url, entry)
+				return entry["spec"]
+		
+		return self._load(url, entry)["spec"]
+	
+	def invalidate(self, url):
+		"""
+		Discard the cached specification of `url`.
+		
+		"""
+		self._lock.acquire()
+		try:
+			self._entries.delete(url)
+		finally:
+			self._lock.release()
+	
+	def _load(self, url, entry):
+		"""
+		(Re-)Download and parse the gadget. If `entry` is given, a conditional
+		request is made and the entry is kept if it has not been modified.
+		
+		"""
+		try:
+			data, info = fetch_service.fetch(url, self._conditional_headers(entry))
+		except urllib2.HTTPError, e:
+			if e.code != 304 or entry == None:
+				raise
+			return self._store(url, dict(entry, fetched=time.time()))
+		return self._store(url, self._make_entry(data, info))
+	
+	def _revalidate_async(self, url, entry):
+		"""
+		Revalidate an entry in the background (using the fetch service's
+		worker threads). The stale entry is kept if this fails.
+		
+		"""
+		def revalidated(job):
+			if job.error == None:
+				try:
+					self._store(url, self._make_entry(job.data, job.info))
+				except (ValueError, etree.XMLSyntaxError):
+					pass
+			elif isinstance(job.error, urllib2.HTTPError) and job.error.code == 304:
+				self._store(url, dict(entry, fetched=time.time()))
+		
+		fetch_service.submit(url, self._conditional_headers(entry), revalidated)
+	
+	def _conditional_headers(self, entry):
+		headers = {}
+		if entry != None:
+			if entry["etag"]:
+				headers["If-None-Match"] = entry["etag"]
+			if entry["last_modified"]:
+				headers["If-Modified-Since"] = entry["last_modified"]
+		return headers
+	
+	def _make_entry(self, data, info):
+		return {
+			"spec": GadgetLoader.parse(data),
+			"etag": info.get("ETag", None),
+			"last_modified": info.get("Last-Modified", None),
+			"mtime": None,
+			"fetched": time.time(),
+		}
+	
+	def _store(self, url, entry):
+		self._lock.acquire()
+		try:
+			self._entries.set(url, entry)
+		finally:
+			self._lock.release()
+		return entry
+
+gadget_spec_cache = GadgetSpecCache(
+	getattr(settings, "GADGET_CACHE_SIZE", 256),
+	getattr(settings, "GADGET_CACHE_FRESH_SECONDS", 300),
+	getattr(settings, "GADGET_CACHE_STALE_SECONDS", 3600),
+)
+
 class GadgetLoader:
 	
 	SUPPORTED_FEATURES = ("rpc", "wave", "wave-preview", "setprefs", "dynamic-height")
+	OPTIONAL_ATTRIBUTES = ("description", "height", "author", "author_email")
 	
-	def __init__(self, url):
+	def __init__(self, url, cache=gadget_spec_cache):
 		"""
-		Parses a Gadget's XML data after downloading it.
-		Throws urllib2.HTTPError if download failed.
+		Parses a Gadget's XML data after downloading it. Parsed gadgets are
+		taken from `cache` if possible; set it to None to bypass the cache.
+		Throws urllib2.HTTPError or urllib2.URLError if download failed (or
+		timed out).
 		Throws lxml.etree.XMLSyntaxError if not well-formatted.
 		Throws ValueError if it is not a valid (Wave-) Gadget.
 		
 		"""
 		
-		opener = urllib2.build_opener(urllib2.HTTPRedirectHandler())
+		if cache != None:
+			spec = cache.get(url)
+		elif url.startswith("file://"):
+			spec = GadgetLoader.parse_file(url[7:])
+		else:
+			spec = GadgetLoader.parse(fetch_service.fetch(url)[0])
+		
+		self.url = url
+		self.version = spec["version"]
+		self.title = spec["title"]
+		self.description = spec["description"]
+		self.height = spec["height"]
+		self.author = spec["author"]
+		self.author_email = spec["author_email"]
+		self.features = spec["features"]
+		self.prefs = copy.deepcopy(spec["prefs"])
+		self.content = spec["content"]
+	
+	@staticmethod
+	def parse(data):
+		"""
+		Parse a Gadget's XML data into a dictionary. All information is
+		gathered in a single traversal of the document. The "version" entry
+		is a hash of the data.
+		Throws lxml.etree.XMLSyntaxError if not well-formatted.
+		Throws ValueError if it is not a valid (Wave-) Gadget.
+		
+		"""
+		
+		return GadgetLoader.__parseRoot(etree.XML(data), sha_constructor(data).hexdigest())
+	
+	@staticmethod
+	def parse_file(filename, chunk_size=16384):
+		"""
+		Parse a Gadget's XML file like `parse`, without reading the whole
+		file into memory.
+		Throws urllib2.URLError if the file cannot be read.
+		Throws lxml.etree.XMLSyntaxError if not well-formatted.
+		Throws ValueError if it is not a valid (Wave-) Gadget.
+		
+		"""
 		
-		# Download
-		reader = opener.open(url)
-		root = etree.XML(reader.read())
-		reader.close()
+		parser = etree.XMLParser()
+		sha = sha_constructor()
+		try:
+			f = open(filename, "rb")
+			try:
+				while True:
+					chunk = f.read(chunk_size)
+					if not chunk:
+						break
+					sha.update(chunk)
+					parser.feed(chunk)
+			finally:
+				f.close()
+		except IOError, e:
+			raise urllib2.URLError(e)
 		
+		return GadgetLoader.__parseRoot(parser.close(), sha.hexdigest())
+	
+	@staticmethod
+	def __parseRoot(root, version):
 		if root.tag != "Module":
 			raise ValueError(_(u'Invalid Gadget XML format (Module tag missing)'))
 		
-		# Title
-		title = root.xpath("//ModulePrefs/attribute::title")
-		if len(title) != 1:
+		titles = []
+		attrs = {}
+		features = {}
+		unsupported = None
+		prefs = {}
+		content = []
+		
+		for elt in root.iter():
+			tag = elt.tag
+			if tag == "ModulePrefs":
+				title = elt.get("title")
+				if title != None:
+					titles.append(title)
+				for attr in GadgetLoader.OPTIONAL_ATTRIBUTES:
+					if not attrs.has_key(attr) and elt.get(attr) != None:
+						attrs[attr] = elt.get(attr)
+			
+			elif tag == "Require":
+				feat = elt.get("feature")
+				if feat == None or elt.getparent().tag != "ModulePrefs": continue
+				feat = feat.lower()
+				if feat in GadgetLoader.SUPPORTED_FEATURES:
+					features[feat.replace("-", "_")] = True
+				elif unsupported == None:
+					unsupported = feat
+			
+			elif tag == "UserPref":
+				if elt.get("name"):
+					prefs[elt.get("name")] = GadgetLoader.__parsePref(elt)
+			
+			elif tag == "Content":
+				# Same as the text nodes selected by "Content/text()"
+				if elt.text != None:
+					content.append(elt.text)
+				for child in elt:
+					if child.tail != None:
+						content.append(child.tail)
+		
+		if len(titles) != 1:
 			raise ValueError(_(u'Invalid Gadget XML format (ModulePrefs/title missing)'))
-		self.title = title[0]
-		
-		# Optional attributes
-		self.description, self.height, self.author, self.author_email = self.__getAttrsOrNone(root, "//ModulePrefs", ("description", "height", "author", "author_email"))
-		
-		# Requires/Features
-		self.features = {}
-		for req in root.xpath("//ModulePrefs/Require"):
-			feat = req.get("feature")
-			if feat == None: continue
-			feat = feat.lower()
-			if feat in GadgetLoader.SUPPORTED_FEATURES:
-				self.features[feat.replace("-", "_")] = True
-			else:
-				raise ValueError(_(u'Required feature "%s" is unsupported') % (feat))
-		
-		# Userprefs
-		self.prefs = {}
-		for pref in root.xpath("//UserPref"):
-			if pref.get("name"):
-				prefmap = dict(pref.attrib)
-				del prefmap["name"]
-				if prefmap.has_key("datatype"):
-					prefmap["datatype"] = prefmap["datatype"].lower()
-					if prefmap["datatype"] == "list":
-						if prefmap.has_key("default_value"):
-							prefmap["default_value"] = prefmap["default_value"].split("|")
-					elif prefmap["datatype"] == "bool":
-						if prefmap.has_key("default_value"):
-							if prefmap["default_value"] == "" \
-								or prefmap["default_value"].lower() == "false" \
-								or prefmap["default_value"] == "0":
-								prefmap["default_value"] = False
-							else:
-								prefmap["default_value"] = True
-				else:
-					prefmap["datatype"] = "string"
-				self.prefs[pref.get("name")] = prefmap
-		
-		# Content
-		content = root.xpath("//Content/text()")
+		
+		if unsupported != None:
+			raise ValueError(_(u'Required feature "%s" is unsupported') % (unsupported))
+		
 		if len(content) != 1:
 			raise ValueError(_(u'Invalid Gadget XML format (Content tag missing)'))
 		
-		self.content = content[0]
+		return {
+			"version": version,
+			"title": titles[0],
+			"description": attrs.get("description", None),
+			"height": attrs.get("height", None),
+			"author": attrs.get("author", None),
+			"author_email": attrs.get("author_email", None),
+			"features": features,
+			"prefs": prefs,
+			"content": content[0],
+		}
+	
+	@staticmethod
+	def __parsePref(pref):
+		prefmap = dict(pref.attrib)
+		del prefmap["name"]
+		if prefmap.has_key("datatype"):
+			prefmap["datatype"] = prefmap["datatype"].lower()
+			if prefmap["datatype"] == "list":
+				if prefmap.has_key("default_value"):
+					prefmap["default_value"] = prefmap["default_value"].split("|")
+			elif prefmap["datatype"] == "bool":
+				if prefmap.has_key("default_value"):
+					if prefmap["default_value"] == "" \
+						or prefmap["default_value"].lower() == "false" \
+						or prefmap["default_value"] == "0":
+						prefmap["default_value"] = False
+					else:
+						prefmap["default_value"] = True
+		else:
+			prefmap["datatype"] = "string"
+		return prefmap
 	
 	def update_prefs(self, data):
 		"""
@@ -154,13 +380,3 @@ class GadgetLoader:
 	
 	def prefs_json(self):
 		return simplejson.dumps(self.prefs)
-	
-	def __getAttrOrNone(self, root, path, attr):
-		v = root.xpath("%s/attribute::%s" % (path, attr))
-		if len(v) > 0:
-			return v[0]
-		else:
-			return None
-	
-	def __getAttrsOrNone(self, root, path, attrs):
-		return [self.__getAttrOrNone(root, path, attr) for attr in attrs]
@@ -0,0 +1,229 @@
+
+#
+# PyGoWave Server - The Python Google Wave Server
+# Copyright 2009 Patrick Schneider <patrick.p2k.schneider@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from django.conf import settings
+
+import urllib2, urlparse, threading, Queue, socket, time
+
+class FetchJob(object):
+	"""
+	A pending or finished download. Any number of threads may wait for its
+	result; callbacks are called (in a worker thread) when it is done.
+	
+	"""
+	
+	def __init__(self, url, headers):
+		self.url = url
+		self.headers = headers
+		self.host = urlparse.urlsplit(url)[1].lower()
+		self.data = None
+		self.info = None
+		self.error = None
+		self.callbacks = []
+		self._done = threading.Event()
+	
+	def done(self):
+		return self._done.isSet()
+	
+	def wait(self, timeout=None):
+		"""
+		Wait for the download and return a (data, info) tuple. Raises the
+		error of the download or urllib2.URLError if `timeout` seconds
+		passed.
+		
+		"""
+		self._done.wait(timeout)
+		if not self._done.isSet():
+			raise urllib2.URLError(socket.timeout("timed out waiting for %s" % (self.url)))
+		if self.error != None:
+			raise self.error
+		return self.data, self.info
+	
+	def _finish(self, data, info, error):
+		self.data, self.info, self.error = data, info, error
+		self._done.set()
+		for callback in self.callbacks:
+			try:
+				callback(self)
+			except Exception:
+				pass
+
+class FetchService(object):
+	"""
+	Downloads URLs in a bounded pool of worker threads.
+	
+	- At most `workers` downloads run at the same time and at most `per_host`
+	  of them go to the same host; further jobs for that host wait without
+	  blocking a worker.
+	- `connect_timeout` applies to connecting and receiving the headers,
+	  `read_timeout` to reading the whole body.
+	- Responses larger than `max_size` bytes are aborted.
+	- Concurrent requests for the same URL (and headers) share one download.
+	
+	Errors are reported as urllib2.URLError (or urllib2.HTTPError for HTTP
+	error codes, including 304 Not Modified).
+	
+	"""
+	
+	chunk_size = 16384
+	
+	def __init__(self, workers=4, per_host=2, connect_timeout=5, read_timeout=10, max_size=524288):
+		self.workers = workers
+		self.per_host = per_host
+		self.connect_timeout = connect_timeout
+		self.read_timeout = read_timeout
+		self.max_size = max_size
+		
+		self._queue = Queue.Queue()
+		self._lock = threading.Lock()
+		self._jobs = {}
+		self._host_active = {}
+		self._host_waiting = {}
+		self._threads = []
+	
+	def submit(self, url, headers={}, callback=None):
+		"""
+		Schedule a download of `url` and return its FetchJob. If the same
+		download is already pending, its job is returned instead.
+		
+		"""
+		key = (url, tuple(sorted(headers.items())))
+		self._lock.acquire()
+		try:
+			job = self._jobs.get(key, None)
+			if job == None:
+				job = FetchJob(url, dict(headers))
+				self._jobs[key] = job
+				self._start_workers()
+				self._schedule(job)
+			if callback != None:
+				job.callbacks.append(callback)
+		finally:
+			self._lock.release()
+		return job
+	
+	def fetch(self, url, headers={}):
+		"""
+		Download `url` and return a (data, info) tuple, where info holds the
+		response headers.
+		
+		"""
+		return self.submit(url, headers).wait(self.connect_timeout + self.read_timeout)
+	
+	def _start_workers(self):
+		# Called with lock held
+		while len(self._threads) < self.workers:
+			thread = threading.Thread(target=self._work)
+			thread.setDaemon(True)
+			thread.start()
+			self._threads.append(thread)
+	
+	def _schedule(self, job):
+		# Called with lock held
+		if self._host_active.get(job.host, 0) < self.per_host:
+			self._host_active[job.host] = self._host_active.get(job.host, 0) + 1
+			self._queue.put(job)
+		else:
+			self._host_waiting.setdefault(job.host, []).append(job)
+	
+	def _work(self):
+		while True:
+			job = self._queue.get()
+			data, info, error = None, None, None
+			try:
+				data, info = self._download(job)
+			except urllib2.URLError, e:
+				error = e
+			except Exception, e:
+				error = urllib2.URLError(e)
+			
+			self._lock.acquire()
+			try:
+				del self._jobs[(job.url, tuple(sorted(job.headers.items())))]
+				self._host_active[job.host] -= 1
+				waiting = self._host_waiting.get(job.host, None)
+				if waiting:
+					self._schedule(waiting.pop(0))
+				elif waiting != None:
+					del self._host_waiting[job.host]
+			finally:
+				self._lock.release()
+			
+			job._finish(data, info, error)
+	
+	def _download(self, job):
+		"""
+		Perform the actual download of a job.
+		
+		"""
+		request = urllib2.Request(job.url)
+		for name, value in job.headers.iteritems():
+			request.add_header(name, value)
+		
+		opener = urllib2.build_opener(urllib2.HTTPRedirectHandler())
+		reader = opener.open(request, timeout=self.connect_timeout)
+		try:
+			info = reader.info()
+			length = info.get("Content-Length", None)
+			if length != None and length.isdigit() and int(length) > self.max_size:
+				raise urllib2.URLError("Response of %s exceeds %d bytes" % (job.url, self.max_size))
+			
+			sock = self._socket(reader)
+			deadline = time.time() + self.read_timeout
+			chunks, size = [], 0
+			while True:
+				if sock != None:
+					# Bound each read by the time left for the whole body
+					sock.settimeout(max(deadline - time.time(), 0.001))
+				chunk = reader.read(self.chunk_size)
+				if not chunk:
+					break
+				size += len(chunk)
+				if size > self.max_size:
+					raise urllib2.URLError("Response of %s exceeds %d bytes" % (job.url, self.max_size))
+				if time.time() > deadline:
+					raise urllib2.URLError(socket.timeout("timed out reading %s" % (job.url)))
+				chunks.append(chunk)
+		finally:
+			reader.close()
+		
+		return "".join(chunks), info
+	
+	def _socket(self, reader):
+		"""
+		Return the socket of a HTTP response or None if it is not available
+		(e.g. the body has already been read completely). urllib2 wraps it
+		in several file objects (addinfourl, socket._fileobject,
+		httplib.HTTPResponse and another socket._fileobject).
+		
+		"""
+		obj = reader
+		while obj != None and not hasattr(obj, "settimeout"):
+			if hasattr(obj, "_sock"):
+				obj = obj._sock
+			else:
+				obj = getattr(obj, "fp", None)
+		return obj
+
+fetch_service = FetchService(
+	getattr(settings, "GADGET_FETCH_WORKERS", 4),
+	getattr(settings, "GADGET_FETCH_PER_HOST", 2),
+	getattr(settings, "GADGET_FETCH_CONNECT_TIMEOUT", 5),
+	getattr(settings, "GADGET_FETCH_READ_TIMEOUT", 10),
+	getattr(settings, "GADGET_FETCH_MAX_SIZE", 524288),
+)
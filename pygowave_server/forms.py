@@ -177,7 +177,7 @@ class GadgetRegistryForm(forms.ModelForm):
 		# Check Gadget
 		try:
 			gadget = GadgetLoader(url)
-		except urllib2.HTTPError:
+		except (urllib2.HTTPError, urllib2.URLError):
 			raise forms.ValidationError(_(u'Gadget could not be downloaded.'))
 		except XMLSyntaxError:
 			raise forms.ValidationError(_(u'Gadget quick-check failed: Bad XML format.'))
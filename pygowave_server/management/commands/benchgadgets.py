@@ -0,0 +1,126 @@
+
+#
+# PyGoWave Server - The Python Google Wave Server
+# Copyright 2009 Patrick Schneider <patrick.p2k.schneider@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.utils.hashcompat import sha_constructor
+
+from pygowave_server.engine import GadgetLoader
+
+from lxml import etree
+from optparse import make_option
+import os, glob, time, urllib2
+
+def parse_xpath(data):
+	"""
+	Reference parser which evaluates one XPath expression per property, like
+	GadgetLoader did before it parsed in a single pass. Returns the same
+	dictionary as GadgetLoader.parse.
+	
+	"""
+	root = etree.XML(data)
+	if root.tag != "Module":
+		raise ValueError("Module tag missing")
+	title = root.xpath("//ModulePrefs/attribute::title")
+	if len(title) != 1:
+		raise ValueError("ModulePrefs/title missing")
+	spec = {"version": sha_constructor(data).hexdigest(), "title": title[0], "features": {}, "prefs": {}}
+	for attr in GadgetLoader.OPTIONAL_ATTRIBUTES:
+		v = root.xpath("//ModulePrefs/attribute::%s" % (attr))
+		if len(v) > 0:
+			spec[attr] = v[0]
+		else:
+			spec[attr] = None
+	for req in root.xpath("//ModulePrefs/Require"):
+		feat = req.get("feature")
+		if feat == None: continue
+		feat = feat.lower()
+		if not feat in GadgetLoader.SUPPORTED_FEATURES:
+			raise ValueError('Required feature "%s" is unsupported' % (feat))
+		spec["features"][feat.replace("-", "_")] = True
+	for pref in root.xpath("//UserPref"):
+		if pref.get("name"):
+			spec["prefs"][pref.get("name")] = GadgetLoader._GadgetLoader__parsePref(pref)
+	content = root.xpath("//Content/text()")
+	if len(content) != 1:
+		raise ValueError("Content tag missing")
+	spec["content"] = content[0]
+	return spec
+
+class Command(BaseCommand):
+	"""
+	Microbenchmark for gadget XML parsing. Parses a corpus of gadget XML
+	files (or URLs) with GadgetLoader.parse and with the XPath-based
+	reference parser, checks that both yield the same results and reports
+	the parse times.
+	
+	"""
+	
+	option_list = BaseCommand.option_list + (
+		make_option('--rounds', dest='rounds', type='int', default=200,
+			help='Number of times each gadget is parsed.'),
+	)
+	help = 'Benchmarks gadget XML parsing on the given files/URLs (default: all hosted gadgets).'
+	args = '[file or URL ...]'
+	
+	def handle(self, *args, **options):
+		sources = list(args)
+		if not sources:
+			sources = glob.glob(os.path.join(settings.GADGET_ROOT, "*.xml"))
+		if not sources:
+			raise CommandError("No gadget XML files found in %s" % (settings.GADGET_ROOT))
+		
+		corpus = []
+		for source in sources:
+			if not "://" in source:
+				source = "file://" + os.path.abspath(source)
+			reader = urllib2.urlopen(source)
+			try:
+				corpus.append((source, reader.read()))
+			finally:
+				reader.close()
+		
+		rounds = max(options["rounds"], 1)
+		total_single = total_xpath = 0.0
+		for source, data in corpus:
+			try:
+				expected = parse_xpath(data)
+			except (ValueError, etree.XMLSyntaxError), e:
+				print "%s: skipped (%s)" % (source, e)
+				continue
+			if GadgetLoader.parse(data) != expected:
+				raise CommandError("%s: results differ from the reference parser" % (source))
+			
+			t_xpath = self.measure(parse_xpath, data, rounds)
+			t_single = self.measure(GadgetLoader.parse, data, rounds)
+			total_xpath += t_xpath
+			total_single += t_single
+			print "%s: %.1f us (xpath: %.1f us)" % (source, t_single * 1e6, t_xpath * 1e6)
+		
+		if total_single > 0:
+			print "Total: %.1f us per corpus (xpath: %.1f us), speedup %.2fx" % (total_single * 1e6, total_xpath * 1e6, total_xpath / total_single)
+	
+	def measure(self, func, data, rounds):
+		"""
+		Return the mean time in seconds of `func(data)`.
+		
+		"""
+		start = time.time()
+		for i in xrange(rounds):
+			func(data)
+		return (time.time() - start) / rounds
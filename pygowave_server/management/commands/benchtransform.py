@@ -0,0 +1,102 @@
+
+#
+# PyGoWave Server - The Python Google Wave Server
+# Copyright 2009 Patrick Schneider <patrick.p2k.schneider@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from django.core.management.base import BaseCommand
+
+from pygowave_server.common.operations import OpManager
+from pygowave_server.otfuzz import random_ops
+
+from optparse import make_option
+import random, re, time
+
+def legacy_fire_event(self, type, args = None, delay = None):
+	"""
+	Reference implementation of Events.fireEvent, which normalized the event
+	name before checking for listeners.
+	
+	"""
+	type = re.sub(r"(?i)^on([A-Z])", lambda match: match.group(1).lower(), type)
+	evts = getattr(self, "$events", None)
+	if evts == None or not evts.has_key(type):
+		return self
+	for fn in evts[type]:
+		if isinstance(args, list):
+			fn(*args)
+		elif args != None:
+			fn(args)
+		else:
+			fn()
+	return self
+
+class LegacyOpManager(OpManager):
+	fireEvent = legacy_fire_event
+
+class Command(BaseCommand):
+	"""
+	Microbenchmark for OpManager.transform. Transforms random bundles of
+	incoming operations against random concurrent deltas, like the RPC
+	server does, and compares the throughput with the event dispatch that
+	normalized every event name.
+	
+	"""
+	
+	option_list = BaseCommand.option_list + (
+		make_option('--ops', dest='ops', type='int', default=200,
+			help='Number of operations per bundle and per concurrent delta.'),
+		make_option('--rounds', dest='rounds', type='int', default=20,
+			help='Number of bundles to transform.'),
+		make_option('--seed', dest='seed', type='int', default=0,
+			help='Random seed.'),
+	)
+	help = 'Benchmarks the transformation of operation bundles.'
+	
+	def handle(self, *args, **options):
+		rnd = random.Random(options["seed"])
+		cases = []
+		for i in xrange(max(options["rounds"], 1)):
+			doc_length = rnd.randint(0, 1000)
+			cases.append((random_ops(rnd, options["ops"], doc_length), random_ops(rnd, options["ops"], doc_length)))
+		
+		t_legacy, results_legacy = self.measure(LegacyOpManager, cases)
+		t_current, results_current = self.measure(OpManager, cases)
+		if results_legacy != results_current:
+			print "Warning: results differ"
+		
+		ops = len(cases) * options["ops"]
+		print "Transformed %d x %d operations in %d rounds" % (options["ops"], options["ops"], len(cases))
+		print "Current: %.3f s (%.0f ops/s)" % (t_current, ops / t_current)
+		print "Legacy events: %.3f s (%.0f ops/s), speedup %.2fx" % (t_legacy, ops / t_legacy, t_legacy / t_current)
+	
+	def measure(self, cls, cases):
+		"""
+		Transform all cases with an OpManager class. Returns the time in
+		seconds and the serialized results.
+		
+		"""
+		results = []
+		elapsed = 0.0
+		for incoming, concurrent in cases:
+			opman = cls("fuzz", "fuzz!conv+root")
+			opman.put([op.clone() for op in incoming])
+			concurrent = [op.clone() for op in concurrent]
+			start = time.time()
+			for op in concurrent:
+				opman.transform(op)
+			elapsed += time.time() - start
+			results.append(opman.serialize())
+		return elapsed, results
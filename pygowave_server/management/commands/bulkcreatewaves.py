@@ -0,0 +1,100 @@
+
+#
+# PyGoWave Server - The Python Google Wave Server
+# Copyright 2009 Patrick Schneider <patrick.p2k.schneider@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils import simplejson
+
+from pygowave_server.models import Participant, Wave
+
+from optparse import make_option
+import time
+
+class Command(BaseCommand):
+	"""
+	Create waves in bulk, either from a JSON file (for importing content from
+	other systems) or synthetic ones (for seeding load-test databases).
+	
+	The JSON file must contain a list of objects with the keys "creator"
+	(participant id), "title" and optionally "content" and "participants"
+	(list of participant ids).
+	
+	"""
+	
+	option_list = BaseCommand.option_list + (
+		make_option('--file', dest='file', default=None,
+			help='Import waves from a JSON file.'),
+		make_option('--count', dest='count', type='int', default=0,
+			help='Number of synthetic waves to create.'),
+		make_option('--creator', dest='creator', default=None,
+			help='Participant id of the creator of synthetic waves.'),
+		make_option('--participants', dest='participants', default="",
+			help='Comma-separated participant ids to add to synthetic waves.'),
+		make_option('--batch-size', dest='batch_size', type='int', default=1000,
+			help='Number of waves to create per transaction.'),
+	)
+	help = 'Creates waves in bulk from a JSON file or synthetic ones for load tests.'
+	
+	def handle(self, *args, **options):
+		self._participants = {}
+		
+		if options["file"]:
+			try:
+				specs = simplejson.load(open(options["file"], "r"))
+			except (IOError, ValueError), e:
+				raise CommandError("Could not read %s: %s" % (options["file"], e))
+			specs = [{
+				"creator": self.participant(spec["creator"]),
+				"title": spec.get("title", u""),
+				"content": spec.get("content", u""),
+				"participants": map(self.participant, spec.get("participants", [])),
+			} for spec in specs]
+		elif options["count"] > 0:
+			if not options["creator"]:
+				raise CommandError("--creator is required for synthetic waves")
+			creator = self.participant(options["creator"])
+			participants = [self.participant(p_id) for p_id in options["participants"].split(",") if p_id]
+			specs = [{
+				"creator": creator,
+				"title": u"Load test wave #%d" % (i+1),
+				"content": u"Load test content #%d" % (i+1),
+				"participants": participants,
+			} for i in xrange(options["count"])]
+		else:
+			raise CommandError("Specify either --file or --count")
+		
+		batch_size = max(options["batch_size"], 1)
+		started = time.time()
+		created = 0
+		for start in xrange(0, len(specs), batch_size):
+			created += len(Wave.objects.bulk_create_waves(specs[start:start+batch_size]))
+			if int(options.get("verbosity", 1)) > 1:
+				print "%d/%d waves created" % (created, len(specs))
+		print "Created %d waves in %.2f seconds" % (created, time.time() - started)
+	
+	def participant(self, p_id):
+		"""
+		Look up a participant by id (cached).
+		
+		"""
+		if not self._participants.has_key(p_id):
+			try:
+				self._participants[p_id] = Participant.objects.get(pk=p_id)
+			except ObjectDoesNotExist:
+				raise CommandError("Participant '%s' not found" % (p_id))
+		return self._participants[p_id]
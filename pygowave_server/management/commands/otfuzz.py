@@ -0,0 +1,70 @@
+
+#
+# PyGoWave Server - The Python Google Wave Server
+# Copyright 2009 Patrick Schneider <patrick.p2k.schneider@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pygowave_server.otfuzz import fuzz_equivalence, fuzz_convergence, fuzz_normalization
+
+from optparse import make_option
+
+class Command(BaseCommand):
+	"""
+	Randomized test of operational transformation. Checks that
+	OpManager.transform yields exactly the same operations and events as
+	the reference implementation and that concurrent operations converge on
+	a model document (TP1). Reports the transform throughput on the
+	convergence cases. Finally checks that
+	OpManager.normalize does not change the effect of operations.
+	
+	"""
+	
+	option_list = BaseCommand.option_list + (
+		make_option('--rounds', dest='rounds', type='int', default=2000,
+			help='Number of random cases.'),
+		make_option('--max-ops', dest='max_ops', type='int', default=20,
+			help='Maximum number of operations per side.'),
+		make_option('--max-blips', dest='max_blips', type='int', default=3,
+			help='Maximum number of blips the operations are spread over.'),
+		make_option('--seed', dest='seed', type='int', default=0,
+			help='Random seed.'),
+	)
+	help = 'Checks OpManager.transform and OpManager.normalize with random operations and measures the transform throughput.'
+	
+	def handle(self, *args, **options):
+		rounds = options["rounds"]
+		failures = fuzz_equivalence(rounds, options["max_ops"], options["max_blips"], options["seed"])
+		for failure in failures[:3]:
+			print failure
+		if failures:
+			raise CommandError("%d of %d cases differ from the reference implementation" % (len(failures), rounds))
+		print "Equivalence: %d cases passed" % (rounds)
+		
+		failures, throughput = fuzz_convergence(rounds, options["max_ops"], options["max_blips"], options["seed"])
+		for failure in failures[:3]:
+			print failure
+		if failures:
+			raise CommandError("%d of %d cases do not converge" % (len(failures), rounds))
+		print "Convergence: %d cases passed" % (rounds)
+		print "Throughput: %.0f ops/s" % (throughput)
+		
+		failures, before, after = fuzz_normalization(rounds, options["max_ops"], options["max_blips"], options["seed"])
+		for failure in failures[:3]:
+			print failure
+		if failures:
+			raise CommandError("%d of %d cases were changed by normalization" % (len(failures), rounds))
+		print "Normalization: %d cases passed (%d operations merged to %d)" % (rounds, before, after)
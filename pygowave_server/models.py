@@ -19,18 +19,22 @@
 from datetime import datetime, timedelta
 
 from django.db import models
+from django.db.models import Count, Q
+from django.db.models.signals import post_init, post_save, post_delete
 from django.contrib.auth.models import User
 from django.utils.translation import ugettext_lazy as _
 from django.conf import settings
-from django.db import transaction
+from django.db import transaction, connection
 from django.core.exceptions import ObjectDoesNotExist
-from django.utils.hashcompat import sha_constructor as sha1
+from django.core.cache import cache
 
 from django.utils import simplejson
 
-from pygowave_server.utils import find_random_id, gen_random_id, datetime2milliseconds
+from pygowave_server.utils import gen_random_id, insert_with_random_id, bulk_insert, datetime2milliseconds
 from pygowave_server.common.operations import OpManager, DOCUMENT_DELETE, DOCUMENT_INSERT, \
 	DOCUMENT_ELEMENT_INSERT, DOCUMENT_ELEMENT_DELETE, DOCUMENT_ELEMENT_DELTA, DOCUMENT_ELEMENT_SETPREF
+from pygowave_server.common.checksums import checksum
+from pygowave_server import counters
 
 __author__ = "patrick.p2k.schneider@gmail.com"
 
@@ -44,6 +48,17 @@ ROOT_WAVELET_ID_SUFFIX = '!conv+root'
 # BIG NOTE: All models represent local Waves at the moment - they will later
 #           be extended to have a domain field which specifies external Waves.
 
+def _bulk_insert_model(model, field_names, rows, chunk_size):
+	"""
+	Bulk insert rows of python values for the given fields of `model`.
+	
+	"""
+	fields = [model._meta.get_field(name) for name in field_names]
+	prepared = []
+	for row in rows:
+		prepared.append([f.get_db_prep_save(value) for f, value in zip(fields, row)])
+	bulk_insert(model._meta.db_table, [f.column for f in fields], prepared, chunk_size)
+
 class ParticipantManager(models.Manager):
 	"""
 	This class provides a method to determine the number of online users.
@@ -69,7 +84,7 @@ class Participant(models.Model):
 	id = models.CharField(max_length=255, primary_key=True)
 	user = models.ForeignKey(User, blank=True, null=True, unique=True, related_name="participants")
 	is_bot = models.BooleanField()
-	last_contact = models.DateTimeField()
+	last_contact = models.DateTimeField(db_index=True)
 	
 	name = models.CharField(max_length=255, blank=True)
 	avatar = models.URLField(verify_exists=False, blank=True)
@@ -111,25 +126,25 @@ class ParticipantConn(models.Model):
 	
 	participant = models.ForeignKey(Participant, related_name="connections")
 	created = models.DateTimeField(auto_now_add=True)
-	rx_key = models.CharField(max_length=42)
-	tx_key = models.CharField(max_length=42)
+	rx_key = models.CharField(max_length=42, unique=True)
+	tx_key = models.CharField(max_length=42, unique=True)
 	
 	def save(self, force_insert=False, force_update=False):
 		if not self.id:
-			self.rx_key, self.tx_key = self.find_random_keys()
-			super(ParticipantConn, self).save(True)
+			def assign_keys():
+				self.rx_key, self.tx_key = self.gen_random_keys()
+			insert_with_random_id(lambda: super(ParticipantConn, self).save(True), assign_keys)
 		else:
 			super(ParticipantConn, self).save(force_insert, force_update)
 	
 	@classmethod
-	def find_random_keys(cls):
-		rx_key = gen_random_id(10)
-		while cls.objects.filter(rx_key=rx_key).count() > 0:
-			rx_key = gen_random_id(10)
-		tx_key = gen_random_id(10)
-		while cls.objects.filter(tx_key=tx_key).count() > 0:
-			tx_key = gen_random_id(10)
-		return rx_key, tx_key
+	def gen_random_keys(cls):
+		"""
+		Generate a new pair of access keys. Uniqueness is enforced by the
+		database on insert.
+		
+		"""
+		return gen_random_id(10), gen_random_id(10)
 	
 	def __unicode__(self):
 		return u"ParticipantConn '%s/%d'" % (self.participant.id, self.id)
@@ -153,6 +168,65 @@ class WaveManager(models.Manager):
 		wavelet.root_blip = blip
 		wavelet.save()
 		return wave
+	
+	@transaction.commit_on_success
+	def bulk_create_waves(self, waves, chunk_size=500):
+		"""
+		Create and initialize many waves at once using a handful of bulk
+		INSERT statements. `waves` is a sequence of dicts with the keys
+		"creator" (Participant), "title" and optionally "content" (text of the
+		root blip) and "participants" (additional Participants).
+		Returns a list of the new waves' ids.
+		
+		Note: This bypasses the models' save() methods and signals. Random ids
+		are not checked, so a collision aborts the whole batch with an
+		IntegrityError.
+		
+		"""
+		now = datetime.now()
+		wave_ids = []
+		wave_rows, wavelet_rows, blip_rows, participant_rows, root_blips = [], [], [], [], []
+		for spec in waves:
+			wave_id = gen_random_id(10)
+			wavelet_id = wave_id + ROOT_WAVELET_ID_SUFFIX
+			blip_id = gen_random_id(10)
+			creator_id = spec["creator"].id
+			
+			wave_ids.append(wave_id)
+			wave_rows.append((wave_id,))
+			wavelet_rows.append((wavelet_id, wave_id, creator_id, True, None, now, now, spec["title"], 0))
+			blip_rows.append((blip_id, wavelet_id, None, creator_id, 0, now, False, spec.get("content", u"")))
+			root_blips.append((blip_id, wavelet_id))
+			
+			participant_ids = [creator_id]
+			for p in spec.get("participants", []):
+				if not p.id in participant_ids:
+					participant_ids.append(p.id)
+			for p_id in participant_ids:
+				participant_rows.append((wavelet_id, p_id))
+		
+		if not wave_ids:
+			return wave_ids
+		
+		_bulk_insert_model(Wave, ("id",), wave_rows, chunk_size)
+		# Root blips are linked after the blips exist (circular foreign keys)
+		_bulk_insert_model(Wavelet, ("id", "wave", "creator", "is_root", "root_blip", "created", "last_modified", "title", "version"), wavelet_rows, chunk_size)
+		_bulk_insert_model(Blip, ("id", "wavelet", "parent", "creator", "version", "last_modified", "submitted", "text"), blip_rows, chunk_size)
+		
+		m2m = Wavelet._meta.get_field("participants")
+		bulk_insert(m2m.m2m_db_table(), (m2m.m2m_column_name(), m2m.m2m_reverse_name()), participant_rows, chunk_size)
+		
+		qn = connection.ops.quote_name
+		connection.cursor().executemany("UPDATE %s SET %s = %%s WHERE %s = %%s" % (
+			qn(Wavelet._meta.db_table),
+			qn(Wavelet._meta.get_field("root_blip").column),
+			qn(Wavelet._meta.pk.column),
+		), root_blips)
+		transaction.set_dirty()
+		
+		invalidate_inbox_digests(set([p_id for wavelet_id, p_id in participant_rows]))
+		
+		return wave_ids
 
 class Wave(models.Model):
 	"""
@@ -170,14 +244,52 @@ class Wave(models.Model):
 	
 	def save(self, force_insert=False, force_update=False):
 		if not self.id:
-			self.id = find_random_id(Wave.objects, 10)
-			super(Wave, self).save(True)
+			def assign_id():
+				self.id = gen_random_id(10)
+			insert_with_random_id(lambda: super(Wave, self).save(True), assign_id)
 		else:
 			super(Wave, self).save(force_insert, force_update)
 	
 	def __unicode__(self):
 		return u"Wave %s" % (self.id)
 
+def inbox_digest_key(participant_id):
+	"""
+	Return the cache key of the cached first wave list page of a participant.
+	
+	"""
+	return "pygowave_inbox_%s" % (participant_id)
+
+def invalidate_inbox_digests(participant_ids):
+	"""
+	Discard the cached wave list pages of the given participants. Does nothing
+	if WAVE_LIST_CACHE_SECONDS is not set.
+	
+	"""
+	if getattr(settings, "WAVE_LIST_CACHE_SECONDS", 0) > 0:
+		for p_id in participant_ids:
+			cache.delete(inbox_digest_key(p_id))
+
+class WaveletManager(models.Manager):
+	
+	def inbox(self, participant, before=None, limit=50):
+		"""
+		Return up to `limit` wavelets of `participant`, newest modification
+		first, annotated with `participants_count` and with their creator
+		already loaded (i.e. a single query).
+		`before` is a (last_modified, id) tuple of the last wavelet on the
+		previous page (keyset pagination).
+		
+		"""
+		qs = self.annotate(participants_count=Count("participants")) \
+			.filter(participants=participant) \
+			.select_related("creator") \
+			.order_by("-last_modified", "-id")
+		if before != None:
+			last_modified, id = before
+			qs = qs.filter(Q(last_modified__lt=last_modified) | Q(last_modified=last_modified, id__lt=id))
+		return qs[:limit]
+
 class Wavelet(models.Model):
 	"""
 	A wavlet within a wave. Wavelets have an id, exactly one creator and one
@@ -199,6 +311,8 @@ class Wavelet(models.Model):
 	participants = models.ManyToManyField(Participant, related_name="wavelets")
 	participant_conns = models.ManyToManyField(ParticipantConn, related_name="wavelets", verbose_name=_(u'connections'))
 	
+	objects = WaveletManager()
+	
 	def blipById(self, id):
 		"""
 		Returns the Blip object with the given id, if the Blip resides on this
@@ -215,11 +329,23 @@ class Wavelet(models.Model):
 		if not self.id:
 			if self.is_root:
 				self.id = self.wave.id + ROOT_WAVELET_ID_SUFFIX
+				super(Wavelet, self).save(True)
 			else:
-				self.id = find_random_id(Wavelet.objects, 10, prefix=self.wave.id+"!")
-			super(Wavelet, self).save(True)
+				def assign_id():
+					self.id = self.wave.id + "!" + gen_random_id(10)
+				insert_with_random_id(lambda: super(Wavelet, self).save(True), assign_id)
 		else:
 			super(Wavelet, self).save(force_insert, force_update)
+			self.invalidate_inbox_digests()
+	
+	def invalidate_inbox_digests(self):
+		"""
+		Discard the cached wave lists of all participants of this wavelet.
+		Must be called if the wavelet or its participants change.
+		
+		"""
+		if getattr(settings, "WAVE_LIST_CACHE_SECONDS", 0) > 0:
+			invalidate_inbox_digests(self.participants.values_list("id", flat=True))
 	
 	def __unicode__(self):
 		return u"Wavelet '%s' (%s)" % (self.title, self.id)
@@ -256,13 +382,30 @@ class Wavelet(models.Model):
 	
 	def applyOperations(self, ops):
 		"""
-		Apply the operations on the wavelet.
+		Apply the operations on the wavelet. Every Blip which is touched by
+		the operations is loaded once (in a single query) and saved once
+		after all operations have been applied to it (see
+		OpManager.normalize to merge operations beforehand).
 		
 		"""
 		
+		blip_ids = []
+		for op in ops:
+			if op.blipId != "" and not op.blipId in blip_ids:
+				blip_ids.append(op.blipId)
+		if len(blip_ids) == 0:
+			return
+		
+		blips = {}
+		for blip in self.blips.filter(pk__in=blip_ids):
+			blips[blip.id] = blip
+		for blip_id in blip_ids:
+			if not blips.has_key(blip_id):
+				raise Blip.DoesNotExist("Blip %s does not reside on wavelet %s" % (blip_id, self.id))
+		
 		for op in ops:
 			if op.blipId != "":
-				blip = self.blipById(op.blipId)
+				blip = blips[op.blipId]
 				if op.type == DOCUMENT_DELETE:
 					blip.deleteText(op.index, op.property)
 				elif op.type == DOCUMENT_INSERT:
@@ -281,16 +424,40 @@ class Wavelet(models.Model):
 						blip.setElementUserpref(op.index, op.property["key"], op.property["value"])
 					except:
 						pass #TODO: error handling
-				blip.save()
+		
+		for blip_id in blip_ids:
+			blips[blip_id].save()
+	
+	@transaction.commit_on_success
+	def applyOperationBundle(self, opman):
+		"""
+		Apply the operations of an OpManager, raise the wavelet's version and
+		store the operations as a new Delta in one transaction. If anything
+		fails, nothing is changed (including this instance's version).
+		Returns the new version.
+		
+		"""
+		
+		version = self.version
+		try:
+			self.applyOperations(opman.operations)
+			self.version += 1
+			self.save()
+			Delta.createByOpManager(opman, self.version).save()
+		except:
+			self.version = version
+			raise
+		return self.version
 	
-	def blipsums(self):
+	def blipsums(self, algorithm="sha1"):
 		"""
-		Calculates the checksums of all Blips.
+		Calculates the checksums of all Blips with the given algorithm (see
+		pygowave_server.common.checksums).
 		
 		"""
 		blipsums = {}
 		for blip in self.blips.all():
-			blipsums[blip.id] = blip.checksum()
+			blipsums[blip.id] = blip.checksum(algorithm)
 		return blipsums
 	
 class DataDocument(models.Model):
@@ -312,6 +479,9 @@ class Blip(models.Model):
 	position within the text. Elements have no representation within the text
 	in this implementation. Note that arbitrary HTML tags are placed as normal
 	text within the Blip.
+	The editing methods do not manage transactions themselves; operation
+	bundles are applied within one transaction by
+	Wavelet.applyOperationBundle.
 	
 	"""
 	
@@ -327,7 +497,6 @@ class Blip(models.Model):
 	
 	text = models.TextField(blank=True)
 	
-	@transaction.commit_on_success
 	def insertText(self, index, text):
 		"""
 		Insert a text at the specified index. This moves annotations and
@@ -347,7 +516,6 @@ class Blip(models.Model):
 			elt.position += length
 			elt.save()
 	
-	@transaction.commit_on_success
 	def deleteText(self, index, length):
 		"""
 		Delete text at the specified index. This moves annotations and
@@ -366,7 +534,6 @@ class Blip(models.Model):
 			elt.position -= length
 			elt.save()
 	
-	@transaction.commit_on_success
 	def insertElement(self, index, type, properties):
 		"""
 		Insert an element at the specified index. This implicitly adds a
@@ -382,7 +549,6 @@ class Blip(models.Model):
 		elt.set_data(properties)
 		elt.save()
 	
-	@transaction.commit_on_success
 	def deleteElement(self, index):
 		"""
 		Delete an element at the specified index. This implicitly deletes the
@@ -396,7 +562,6 @@ class Blip(models.Model):
 		elt.delete()
 		self.deleteText(index, 1)
 	
-	@transaction.commit_on_success
 	def applyElementDelta(self, index, delta):
 		"""
 		Apply an element delta. Currently only for gadget elements.
@@ -408,7 +573,6 @@ class Blip(models.Model):
 			raise TypeError("Element #%d is not a Gadget Element" % (id))
 		elt.to_gadget().apply_delta(delta)
 	
-	@transaction.commit_on_success
 	def setElementUserpref(self, index, key, value):
 		"""
 		Set an UserPref of an element. Currently only for gadget elements.
@@ -422,8 +586,9 @@ class Blip(models.Model):
 	
 	def save(self, force_insert=False, force_update=False):
 		if not self.id:
-			self.id = find_random_id(Blip.objects, 10)
-			super(Blip, self).save(True)
+			def assign_id():
+				self.id = gen_random_id(10)
+			insert_with_random_id(lambda: super(Blip, self).save(True), assign_id)
 		else:
 			super(Blip, self).save(force_insert, force_update)
 	
@@ -450,14 +615,15 @@ class Blip(models.Model):
 			"checksum": self.checksum() # Note: This is tentative and subject to change
 		}
 	
-	def checksum(self):
+	def checksum(self, algorithm="sha1"):
 		"""
-		Calculate a checksum of this Blip.
-		Note: Currently this is only the SHA-1 of the Blip's text. This is
+		Calculate a checksum of this Blip with the given algorithm (see
+		pygowave_server.common.checksums).
+		Note: Currently this is only the checksum of the Blip's text. This is
 		tentative and subject to change
 		
 		"""
-		return sha1(self.text.encode("utf-8")).hexdigest()
+		return checksum(self.text, algorithm)
 
 	def __unicode__(self):
 		return u"Blip %s on %s" % (self.id, unicode(self.wavelet))
@@ -799,3 +965,8 @@ class Gadget(models.Model):
 	def __unicode__(self):
 		return u"Gadget '%s' by '%s'" % (self.title, self.by_user.username)
 	
+# Connected here, so every process which changes users (not only the one
+# serving the pages with the counters) keeps the cached users count valid
+post_init.connect(counters.remember_user_active, sender=User)
+post_save.connect(counters.user_saved, sender=User)
+post_delete.connect(counters.user_deleted, sender=User)
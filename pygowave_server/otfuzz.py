@@ -0,0 +1,500 @@
+
+#
+# PyGoWave Server - The Python Google Wave Server
+# Copyright 2009 Patrick Schneider <patrick.p2k.schneider@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Randomized tests for operational transformation: generates random
+concurrent operations, compares OpManager.transform with the reference
+implementation below and checks that concurrent operations converge on a
+model document. Also checks that OpManager.normalize preserves the
+effect of operations.
+
+"""
+
+from pygowave_server.common.operations import OpManager, Operation, \
+	DOCUMENT_INSERT, DOCUMENT_DELETE, DOCUMENT_ELEMENT_INSERT, DOCUMENT_ELEMENT_DELETE, \
+	DOCUMENT_ELEMENT_DELTA, DOCUMENT_ELEMENT_SETPREF
+
+import random, time
+
+WAVE_ID = "fuzz"
+WAVELET_ID = "fuzz!conv+root"
+
+def random_ops(rnd, count, doc_length, blip_id="b+1", changes=True):
+	"""
+	Generate `count` random operations on a blip, which are applicable in
+	sequence to a document of `doc_length` characters. If `changes` is
+	False, no element deletions and changes are generated.
+	
+	"""
+	ops = []
+	for i in xrange(count):
+		r = rnd.random()
+		if doc_length == 0 or r < 0.45:
+			text = "".join([rnd.choice("abcdefgh ") for k in xrange(rnd.randint(1, 8))])
+			op = Operation(DOCUMENT_INSERT, WAVE_ID, WAVELET_ID, blip_id, rnd.randint(0, doc_length), text)
+		elif r < 0.8:
+			index = rnd.randint(0, doc_length - 1)
+			op = Operation(DOCUMENT_DELETE, WAVE_ID, WAVELET_ID, blip_id, index, rnd.randint(1, min(8, doc_length - index)))
+		elif r < 0.9 or not changes:
+			op = Operation(DOCUMENT_ELEMENT_INSERT, WAVE_ID, WAVELET_ID, blip_id, rnd.randint(0, doc_length), {"type": 2, "properties": {}})
+		elif r < 0.95:
+			op = Operation(DOCUMENT_ELEMENT_DELETE, WAVE_ID, WAVELET_ID, blip_id, rnd.randint(0, doc_length - 1), None)
+		elif r < 0.98:
+			op = Operation(DOCUMENT_ELEMENT_DELTA, WAVE_ID, WAVELET_ID, blip_id, rnd.randint(0, doc_length - 1), {"id": i, "delta": {}})
+		else:
+			op = Operation(DOCUMENT_ELEMENT_SETPREF, WAVE_ID, WAVELET_ID, blip_id, rnd.randint(0, doc_length - 1), {"key": "k", "value": "v"})
+		if op.isInsert():
+			doc_length += op.length()
+		elif op.isDelete():
+			doc_length -= op.length()
+		ops.append(op)
+	return ops
+
+def random_bundle(rnd, count, doc_lengths, changes=True):
+	"""
+	Generate `count` random operations spread over the blips "b+0",
+	"b+1", ... with the given document lengths (a list, which is updated).
+	See random_ops for `changes`.
+	
+	"""
+	ops = []
+	for i in xrange(count):
+		b = rnd.randint(0, len(doc_lengths) - 1)
+		op = random_ops(rnd, 1, doc_lengths[b], "b+%d" % (b), changes)[0]
+		if op.isInsert():
+			doc_lengths[b] += op.length()
+		elif op.isDelete():
+			doc_lengths[b] -= op.length()
+		ops.append(op)
+	return ops
+
+def reference_transform(self, input_op):
+	"""
+	The original implementation of OpManager.transform, which visits every
+	pair of operations. Used to verify optimized versions.
+	
+	"""
+	new_op = None
+	op_lst = [input_op.clone()]
+	
+	i = 0
+	while i < len(self.operations):
+		myop = self.operations[i]
+		j = 0
+		while j < len(op_lst):
+			op = op_lst[j]
+			
+			# Do not handle incompatible operations
+			if not op.isCompatibleTo(myop):
+				j += 1 # (missing in the original, which never terminated here)
+				continue
+			
+			# Check all possible cases
+			
+			end = None
+			if op.isDelete() and myop.isDelete():
+				if op.index < myop.index:
+					end = op.index + op.length()
+					if end <= myop.index:
+						myop.index -= op.length()
+						self.fireEvent("operationChanged", i)
+					elif end < myop.index + myop.length(): # and end > myop.index
+						op.resize(myop.index - op.index)
+						myop.resize(myop.length() - (end - myop.index))
+						myop.index = op.index
+						self.fireEvent("operationChanged", i)
+					else: # end >= myop.index + myop.length()
+						op.resize(op.length() - myop.length())
+						self.fireEvent("beforeOperationsRemoved", [i, i])
+						self.operations.pop(i)
+						self.fireEvent("afterOperationsRemoved", [i, i])
+						i -= 1
+						break
+				else: # op.index >= myop.index
+					end = myop.index + myop.length()
+					if op.index >= end:
+						op.index -= myop.length()
+					elif op.index + op.length() <= end: # and op.index < end
+						myop.resize(myop.length() - op.length())
+						op_lst.pop(j)
+						j -= 1
+						if myop.isNull():
+							self.fireEvent("beforeOperationsRemoved", [i, i])
+							self.operations.pop(i)
+							self.fireEvent("afterOperationsRemoved", [i, i])
+							i -= 1
+							break
+						else:
+							self.fireEvent("operationChanged", i)
+					else: # op.index + op.length() > end
+						myop.resize(myop.length() - (end - op.index))
+						self.fireEvent("operationChanged", i)
+						op.resize(op.length() - (end - op.index))
+						op.index = myop.index
+			
+			elif op.isDelete() and myop.isInsert():
+				if op.index < myop.index:
+					if op.index + op.length() <= myop.index:
+						myop.index -= op.length()
+						self.fireEvent("operationChanged", i)
+					else: # op.index + op.length() > myop.index
+						new_op = op.clone()
+						op.resize(myop.index - op.index)
+						new_op.resize(new_op.length() - op.length())
+						op_lst.insert(j+1, new_op)
+						myop.index -= op.length()
+						self.fireEvent("operationChanged", i)
+				else: # op.index >= myop.index
+					op.index += myop.length()
+			
+			elif op.isInsert() and myop.isDelete():
+				if op.index <= myop.index:
+					myop.index += op.length()
+					self.fireEvent("operationChanged", i)
+				elif op.index >= myop.index + myop.length(): # op.index > myop.index
+					op.index -= myop.length()
+				else: # op.index < myop.index + myop.length()
+					new_op = myop.clone()
+					myop.resize(op.index - myop.index)
+					self.fireEvent("operationChanged", i)
+					new_op.resize(new_op.length() - myop.length())
+					self.fireEvent("beforeOperationsInserted", [i+1, i+1])
+					self.operations.insert(i+1, new_op)
+					self.fireEvent("afterOperationsInserted", [i+1, i+1])
+					op.index = myop.index
+			
+			elif op.isInsert() and myop.isInsert():
+				if op.index <= myop.index:
+					myop.index += op.length()
+					self.fireEvent("operationChanged", i)
+				else: # op.index > myop.index
+					op.index += myop.length()
+			elif op.isChange() and myop.isDelete():
+				if op.index > myop.index:
+					if op.index <= myop.index + myop.length():
+						op.index = myop.index
+					else:
+						op.index -= myop.length()
+			elif op.isChange() and myop.isInsert():
+				if op.index >= myop.index:
+					op.index += myop.length()
+			elif op.isDelete() and myop.isChange():
+				if op.index < myop.index:
+					if myop.index <= op.index + op.length():
+						myop.index = op.index
+						self.fireEvent("operationChanged", i)
+					else:
+						myop.index -= op.length()
+						self.fireEvent("operationChanged", i)
+			elif op.isInsert() and myop.isChange():
+				if op.index <= myop.index:
+					myop.index += op.length()
+					self.fireEvent("operationChanged", i)
+			
+			j += 1
+		
+		i += 1
+	
+	return op_lst
+
+class ReferenceOpManager(OpManager):
+	transform = reference_transform
+
+class EventLog(object):
+	"""
+	Records the events fired by an OpManager.
+	
+	"""
+	
+	EVENTS = ("operationChanged", "beforeOperationsRemoved", "afterOperationsRemoved", "beforeOperationsInserted", "afterOperationsInserted")
+	
+	def __init__(self, opman):
+		self.events = []
+		for name in EventLog.EVENTS:
+			opman.addEvent(name, self.recorder(name))
+	
+	def recorder(self, name):
+		def record(*args):
+			self.events.append((name, args))
+		return record
+
+def serialize_ops(ops):
+	return [op.serialize() for op in ops]
+
+def check_equivalence(rnd, pending_count, incoming_count, blips=1):
+	"""
+	Transform random pending operations against random incoming operations
+	with OpManager.transform and reference_transform. Returns None if the
+	results (including the fired events) are identical, otherwise a
+	description of the case.
+	
+	Element deletions and changes are left out: OpManager.transform drops
+	deletions and changes of concurrently deleted elements, which the
+	original implementation did not. Those cases are covered by the
+	convergence check.
+	
+	"""
+	doc_lengths = [rnd.randint(0, 200) for b in xrange(blips)]
+	pending = random_bundle(rnd, pending_count, list(doc_lengths), False)
+	incoming = random_bundle(rnd, incoming_count, list(doc_lengths), False)
+	
+	results = []
+	for cls in (OpManager, ReferenceOpManager):
+		opman = cls(WAVE_ID, WAVELET_ID)
+		opman.put([op.clone() for op in pending])
+		log = EventLog(opman)
+		transformed = [serialize_ops(opman.transform(op.clone())) for op in incoming]
+		results.append((opman.serialize(), transformed, log.events))
+	
+	if results[0] == results[1]:
+		return None
+	return "pending: %r\nincoming: %r" % (pending, incoming)
+
+def fuzz_equivalence(rounds, max_ops=20, max_blips=3, seed=0):
+	"""
+	Run `rounds` random equivalence checks. Returns a list of failing cases.
+	
+	"""
+	rnd = random.Random(seed)
+	failures = []
+	for i in xrange(rounds):
+		failure = check_equivalence(rnd, rnd.randint(0, max_ops), rnd.randint(1, max_ops), rnd.randint(1, max_blips))
+		if failure != None:
+			failures.append(failure)
+	return failures
+
+class ModelError(Exception):
+	"""
+	Raised if an operation cannot be applied to a model document.
+	
+	"""
+	pass
+
+def model_documents(rnd, doc_lengths):
+	"""
+	Create random model documents with the given lengths, keyed by blip id.
+	A document is a list of characters and elements; an element is a list
+	of the changes (delta and userpref operations) applied to it.
+	
+	"""
+	docs = {}
+	for b in xrange(len(doc_lengths)):
+		doc = []
+		for k in xrange(doc_lengths[b]):
+			if rnd.random() < 0.05:
+				doc.append([])
+			else:
+				doc.append(rnd.choice("ABCDEFGH "))
+		docs["b+%d" % (b)] = doc
+	return docs
+
+def apply_model(docs, ops):
+	"""
+	Apply operations to model documents (see model_documents) like
+	Wavelet.applyOperations applies them to blips. Raises ModelError if an
+	operation is out of range.
+	
+	"""
+	for op in ops:
+		doc = docs[op.blipId]
+		if op.isInsert():
+			if op.index < 0 or op.index > len(doc):
+				raise ModelError("Insertion out of range: %r" % (op))
+			if op.type == DOCUMENT_INSERT:
+				doc[op.index:op.index] = list(op.property)
+			else:
+				doc.insert(op.index, [])
+		elif op.isDelete():
+			if op.index < 0 or op.index + op.length() > len(doc):
+				raise ModelError("Deletion out of range: %r" % (op))
+			del doc[op.index:op.index+op.length()]
+		elif op.index >= 0 and op.index < len(doc) and isinstance(doc[op.index], list):
+			# Changes to anything but an element are ignored by the server
+			doc[op.index].append((op.type, repr(op.property)))
+	return docs
+
+def model_state(docs):
+	"""
+	Return a comparable snapshot of model documents. The order in which
+	changes were applied to an element is not significant.
+	
+	"""
+	state = {}
+	for blip_id, doc in docs.iteritems():
+		items = []
+		for item in doc:
+			if isinstance(item, list):
+				items.append(tuple(sorted(item)))
+			else:
+				items.append(item)
+		state[blip_id] = items
+	return state
+
+def copy_model(docs):
+	copy = {}
+	for blip_id, doc in docs.iteritems():
+		copy[blip_id] = [isinstance(item, list) and list(item) or item for item in doc]
+	return copy
+
+def model_ops(rnd, count, docs):
+	"""
+	Generate `count` random operations which are applicable in sequence to
+	the model documents `docs` and respect their structure like an editor
+	does: text deletions only cover characters, element operations only
+	address elements. Most operations continue at the position of the
+	previous one, like typing, backspacing or deleting forward does.
+	`docs` is updated.
+	
+	"""
+	ops = []
+	blip_ids = sorted(docs.keys())
+	cursor = None
+	for i in xrange(count):
+		if cursor != None and rnd.random() < 0.6:
+			blip_id, near = cursor
+		else:
+			blip_id, near = rnd.choice(blip_ids), None
+		doc = docs[blip_id]
+		chars = [k for k in xrange(len(doc)) if not isinstance(doc[k], list)]
+		elements = [k for k in xrange(len(doc)) if isinstance(doc[k], list)]
+		r = rnd.random()
+		if r < 0.35 or (r < 0.8 and len(chars) == 0) or (r >= 0.9 and len(elements) == 0):
+			if near == None:
+				near = rnd.randint(0, len(doc))
+			text = "".join([rnd.choice("abcdefgh ") for k in xrange(rnd.randint(1, 8))])
+			op = Operation(DOCUMENT_INSERT, WAVE_ID, WAVELET_ID, blip_id, near, text)
+		elif r < 0.8:
+			if near != None and near > 0 and not isinstance(doc[near-1], list) and rnd.random() < 0.5:
+				index = near - 1 # Backspace
+			elif near != None and near < len(doc) and not isinstance(doc[near], list):
+				index = near
+			else:
+				index = rnd.choice(chars)
+			length = 1
+			while length < 8 and index + length < len(doc) and not isinstance(doc[index+length], list):
+				length += 1
+			op = Operation(DOCUMENT_DELETE, WAVE_ID, WAVELET_ID, blip_id, index, rnd.randint(1, length))
+		elif r < 0.9:
+			op = Operation(DOCUMENT_ELEMENT_INSERT, WAVE_ID, WAVELET_ID, blip_id, rnd.randint(0, len(doc)), {"type": 2, "properties": {}})
+		elif r < 0.94:
+			op = Operation(DOCUMENT_ELEMENT_DELETE, WAVE_ID, WAVELET_ID, blip_id, rnd.choice(elements), None)
+		elif r < 0.97:
+			op = Operation(DOCUMENT_ELEMENT_DELTA, WAVE_ID, WAVELET_ID, blip_id, rnd.choice(elements), {"id": i, "delta": {}})
+		else:
+			op = Operation(DOCUMENT_ELEMENT_SETPREF, WAVE_ID, WAVELET_ID, blip_id, rnd.choice(elements), {"key": "k%d" % (i), "value": "v"})
+		apply_model(docs, [op])
+		ops.append(op)
+		if op.type == DOCUMENT_INSERT:
+			cursor = (blip_id, op.index + op.length())
+		else:
+			cursor = (blip_id, op.index)
+	return ops
+
+def check_convergence(rnd, pending_count, incoming_count, blips=1, cls=OpManager):
+	"""
+	Check the convergence property (TP1) for random concurrent operations A
+	(pending, held by an OpManager) and B (incoming): applying A and then
+	the transformed B must yield the same document as applying B and then
+	the transformed A. This is what the server (transforming a client's
+	bundle against newer deltas) and the clients (transforming their
+	pending operations against incoming deltas) rely on.
+	
+	Returns a tuple of the seconds spent in `cls`.transform, the number of
+	transformed operations and None or a description of a failing case.
+	
+	"""
+	docs = model_documents(rnd, [rnd.randint(0, 200) for b in xrange(blips)])
+	pending = model_ops(rnd, pending_count, copy_model(docs))
+	incoming = model_ops(rnd, incoming_count, copy_model(docs))
+	
+	opman = cls(WAVE_ID, WAVELET_ID)
+	opman.put([op.clone() for op in pending])
+	transformed = []
+	start = time.time()
+	for op in incoming:
+		transformed.extend(opman.transform(op.clone()))
+	elapsed = time.time() - start
+	
+	try:
+		left = apply_model(apply_model(copy_model(docs), pending), transformed)
+		right = apply_model(apply_model(copy_model(docs), incoming), opman.operations)
+	except ModelError, e:
+		return elapsed, len(incoming), "%s\npending: %r\nincoming: %r" % (e.args[0], pending, incoming)
+	
+	if model_state(left) == model_state(right):
+		return elapsed, len(incoming), None
+	return elapsed, len(incoming), "Documents diverge\npending: %r\nincoming: %r" % (pending, incoming)
+
+def fuzz_convergence(rounds, max_ops=20, max_blips=3, seed=0, cls=OpManager):
+	"""
+	Run `rounds` random convergence checks. Returns a list of failing cases
+	and the throughput of `cls`.transform in operations per second.
+	
+	"""
+	rnd = random.Random(seed)
+	failures = []
+	elapsed = 0.0
+	count = 0
+	for i in xrange(rounds):
+		t, n, failure = check_convergence(rnd, rnd.randint(0, max_ops), rnd.randint(1, max_ops), rnd.randint(1, max_blips), cls)
+		elapsed += t
+		count += n
+		if failure != None:
+			failures.append(failure)
+	return failures, count / max(elapsed, 1e-9)
+
+def check_normalization(rnd, count, blips=1):
+	"""
+	Normalize random operations with OpManager.normalize. Returns a tuple
+	of the number of operations before and after normalization and None or
+	a description of a case where the normalized operations have a
+	different effect.
+	
+	"""
+	docs = model_documents(rnd, [rnd.randint(0, 200) for b in xrange(blips)])
+	ops = model_ops(rnd, count, copy_model(docs))
+	
+	opman = OpManager(WAVE_ID, WAVELET_ID)
+	opman.put([op.clone() for op in ops])
+	opman.normalize()
+	
+	expected = model_state(apply_model(copy_model(docs), ops))
+	try:
+		if model_state(apply_model(copy_model(docs), opman.operations)) == expected:
+			return len(ops), len(opman.operations), None
+	except ModelError, e:
+		pass
+	return len(ops), len(opman.operations), "Normalization changed the result\noperations: %r\nnormalized: %r" % (ops, opman.operations)
+
+def fuzz_normalization(rounds, max_ops=20, max_blips=3, seed=0):
+	"""
+	Run `rounds` random normalization checks. Returns a list of failing
+	cases and the total number of operations before and after
+	normalization.
+	
+	"""
+	rnd = random.Random(seed)
+	failures = []
+	before = after = 0
+	for i in xrange(rounds):
+		n, m, failure = check_normalization(rnd, rnd.randint(1, max_ops), rnd.randint(1, max_blips))
+		before += n
+		after += m
+		if failure != None:
+			failures.append(failure)
+	return failures, before, after
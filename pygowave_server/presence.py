@@ -0,0 +1,78 @@
+
+#
+# PyGoWave Server - The Python Google Wave Server
+# Copyright 2009 Patrick Schneider <patrick.p2k.schneider@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from django.core.cache import cache
+from django.conf import settings
+
+from pygowave_server.models import Participant
+
+from datetime import datetime, timedelta
+
+class PresenceTracker(object):
+	"""
+	Keeps the last_contact field of participants up to date without writing
+	on every request. The time of the last write is remembered in the cache
+	(use a shared backend like memcached with multiple web workers) and the
+	field is only written again after `interval` seconds, using an UPDATE of
+	that single column.
+	
+	"""
+	
+	key_prefix = "pygowave_presence_"
+	
+	def __init__(self, interval=None):
+		if interval == None:
+			interval = getattr(settings, "ONLINE_FLUSH_INTERVAL_SECONDS", 60)
+		self.interval = interval
+	
+	def touch(self, user):
+		"""
+		Record that `user` has been seen now. Writes to the database at most
+		once per interval. This also creates a participant object if it is
+		missing. Returns True if the database has been written.
+		
+		"""
+		now = datetime.now()
+		key = self.key_prefix + str(user.id)
+		
+		flushed = cache.get(key)
+		if flushed != None and now - flushed < timedelta(seconds=self.interval):
+			return False
+		
+		if Participant.objects.filter(user=user).update(last_contact=now) == 0:
+			profile_obj = Participant()
+			profile_obj.id = "%s@%s" % (user.username, settings.WAVE_DOMAIN)
+			profile_obj.name = user.username
+			profile_obj.user = user
+			profile_obj.last_contact = now
+			profile_obj.save()
+		
+		cache.set(key, now, self.interval)
+		return True
+	
+	def logout(self, user, last_contact):
+		"""
+		Set the last contact of `user` explicitly (e.g. on logout) and forget
+		the last write, so the next request of the user is recorded at once.
+		
+		"""
+		Participant.objects.filter(user=user).update(last_contact=last_contact)
+		cache.delete(self.key_prefix + str(user.id))
+
+# Singleton
+presence = PresenceTracker()
@@ -0,0 +1,356 @@
+
+#
+# PyGoWave Server - The Python Google Wave Server
+# Copyright 2009 Patrick Schneider <patrick.p2k.schneider@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from django.test import TestCase, TransactionTestCase
+from django.db import connection, transaction
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.conf import settings
+
+from pygowave_server.models import Participant, Wave, Wavelet, Blip, Element, Delta
+from pygowave_server.common.operations import OpManager, Operation, DOCUMENT_INSERT, DOCUMENT_DELETE, \
+	DOCUMENT_ELEMENT_INSERT, DOCUMENT_ELEMENT_DELETE
+from pygowave_server.common.checksums import crc32_constructor, checksum, negotiate_checksum
+from pygowave_server.fetcher import FetchService
+from pygowave_server.otfuzz import fuzz_equivalence, fuzz_convergence
+from pygowave_server import counters, utils
+
+from datetime import datetime
+import unittest, urllib2, threading, BaseHTTPServer, time
+
+def create_wavelet(text=u""):
+	"""
+	Create a wave and return its root wavelet, whose root blip contains
+	`text`.
+	
+	"""
+	creator = Participant.objects.get_or_create(id="creator@localhost", defaults={"last_contact": datetime.now()})[0]
+	wavelet = Wave.objects.create_and_init_new_wave(creator, u"Test").root_wavelet()
+	wavelet.root_blip.text = text
+	wavelet.root_blip.save()
+	return wavelet
+
+def count_queries(func, *args):
+	"""
+	Call `func` and return the number of database queries it made.
+	
+	"""
+	debug = settings.DEBUG
+	settings.DEBUG = True
+	connection.queries = []
+	try:
+		func(*args)
+	finally:
+		settings.DEBUG = debug
+	return len(connection.queries)
+
+class BulkCreateWavesTest(TransactionTestCase):
+	"""
+	WaveManager.bulk_create_waves writes through raw SQL; the rows must
+	still be committed.
+	
+	"""
+	
+	def setUp(self):
+		self.creator = Participant.objects.create(id="creator@localhost", last_contact=datetime.now())
+		self.other = Participant.objects.create(id="other@localhost", last_contact=datetime.now())
+		transaction.commit_unless_managed()
+	
+	def create_waves(self, count, chunk_size=500):
+		specs = [{
+			"creator": self.creator,
+			"title": u"Wave #%d" % (i),
+			"content": u"Content #%d" % (i),
+			"participants": [self.other],
+		} for i in xrange(count)]
+		wave_ids = Wave.objects.bulk_create_waves(specs, chunk_size)
+		# Anything not committed by now is thrown away
+		transaction.rollback_unless_managed()
+		return wave_ids
+	
+	def test_committed(self):
+		wave_ids = self.create_waves(10)
+		self.assertEqual(Wave.objects.filter(pk__in=wave_ids).count(), 10)
+		self.assertEqual(Wavelet.objects.filter(wave__in=wave_ids, root_blip__isnull=False).count(), 10)
+		self.assertEqual(Blip.objects.filter(wavelet__wave__in=wave_ids).count(), 10)
+		self.assertEqual(self.other.wavelets.count(), 10)
+	
+	def test_parameter_limit(self):
+		executed = []
+		cursor_factory = connection.cursor
+		def cursor():
+			c = cursor_factory()
+			execute = c.execute
+			def counting_execute(sql, params=()):
+				executed.append(len(params))
+				return execute(sql, params)
+			c.execute = counting_execute
+			return c
+		connection.cursor = cursor
+		try:
+			wave_ids = self.create_waves(300, chunk_size=1000)
+		finally:
+			del connection.cursor
+		self.assertEqual(Wavelet.objects.filter(wave__in=wave_ids).count(), 300)
+		self.assertTrue(max(executed) <= utils.BULK_INSERT_MAX_PARAMS)
+
+class StallingHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+	"""
+	Sends the headers and a part of the body, then stalls until the test
+	releases it.
+	
+	"""
+	
+	def do_GET(self):
+		self.send_response(200)
+		self.send_header("Content-Length", "1000")
+		self.end_headers()
+		self.wfile.write("<Module>")
+		self.wfile.flush()
+		self.server.release.wait(10)
+	
+	def log_message(self, *args):
+		pass
+
+class FetchServiceTest(unittest.TestCase):
+	"""
+	The read timeout must apply to the socket, so a stalling host cannot
+	hold a worker for longer.
+	
+	"""
+	
+	def setUp(self):
+		self.server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), StallingHandler)
+		self.server.release = threading.Event()
+		self.server.handle_error = lambda request, client_address: None # Client went away
+		self.thread = threading.Thread(target=self.server.handle_request)
+		self.thread.setDaemon(True)
+		self.thread.start()
+		self.url = "http://127.0.0.1:%d/gadget.xml" % (self.server.server_address[1])
+	
+	def tearDown(self):
+		self.server.release.set()
+		self.thread.join(5)
+		self.server.server_close()
+	
+	def test_socket_timeout(self):
+		service = FetchService(connect_timeout=5, read_timeout=10)
+		reader = urllib2.urlopen(self.url, timeout=5)
+		try:
+			sock = service._socket(reader)
+			self.assertNotEqual(sock, None)
+			self.assertEqual(sock.gettimeout(), 5)
+		finally:
+			reader.close()
+	
+	def test_read_timeout(self):
+		service = FetchService(connect_timeout=5, read_timeout=0.5)
+		started = time.time()
+		job = service.submit(self.url)
+		self.assertRaises(urllib2.URLError, job.wait, 10)
+		# Without the read timeout, the connect timeout (5 s) would apply
+		self.assertTrue(time.time() - started < 3)
+
+class UsersCounterTest(TestCase):
+	"""
+	The cached user count is only invalidated by changes which affect it.
+	
+	"""
+	
+	def setUp(self):
+		self.user = User.objects.create_user("alice", "alice@localhost", "secret")
+		counters.users_counter.invalidate()
+	
+	def is_cached(self):
+		return cache.get(counters.users_counter.key) != None
+	
+	def test_login_keeps_count(self):
+		counters.users_count()
+		user = User.objects.get(pk=self.user.pk)
+		user.last_login = datetime.now()
+		user.save()
+		self.assertTrue(self.is_cached())
+	
+	def test_changes_invalidate_count(self):
+		count = counters.users_count()
+		User.objects.create_user("bob", "bob@localhost", "secret")
+		self.assertFalse(self.is_cached())
+		self.assertEqual(counters.users_count(), count + 1)
+		
+		user = User.objects.get(pk=self.user.pk)
+		user.is_active = False
+		user.save()
+		self.assertFalse(self.is_cached())
+		self.assertEqual(counters.users_count(), count)
+		
+		user.delete()
+		self.assertFalse(self.is_cached())
+
+class TransformTest(unittest.TestCase):
+	"""
+	Randomized checks of OpManager.transform (see pygowave_server.otfuzz);
+	the seeds are fixed, so failures are reproducible.
+	
+	"""
+	
+	def test_equivalence(self):
+		failures = fuzz_equivalence(500, seed=1)
+		self.assertEqual(failures, [], "%d cases differ from the reference implementation, e.g.\n%s" % (len(failures), "".join(failures[:1])))
+	
+	def test_convergence(self):
+		failures = fuzz_convergence(500, seed=1)[0]
+		self.assertEqual(failures, [], "%d cases do not converge, e.g.\n%s" % (len(failures), "".join(failures[:1])))
+
+class ApplyOperationsTest(TestCase):
+	"""
+	Operation bundles are normalized and applied to the database.
+	
+	"""
+	
+	def setUp(self):
+		self.wavelet = create_wavelet(u"Hello")
+		self.blip = self.wavelet.root_blip
+	
+	def op(self, type, index, property, blip_id=None):
+		if blip_id == None:
+			blip_id = self.blip.id
+		return Operation(type, self.wavelet.wave.id, self.wavelet.id, blip_id, index, property)
+	
+	def test_normalize(self):
+		opman = OpManager(self.wavelet.wave.id, self.wavelet.id)
+		opman.put([
+			self.op(DOCUMENT_INSERT, 5, u" "),
+			self.op(DOCUMENT_INSERT, 6, u"w"),
+			self.op(DOCUMENT_INSERT, 7, u"o"),
+			self.op(DOCUMENT_INSERT, 8, u"o"),
+			self.op(DOCUMENT_DELETE, 8, 1),
+			self.op(DOCUMENT_INSERT, 8, u"r"),
+			self.op(DOCUMENT_DELETE, 0, 1),
+			self.op(DOCUMENT_DELETE, 0, 1),
+		])
+		opman.normalize()
+		self.assertEqual([(op.type, op.index, op.property) for op in opman.operations], [
+			(DOCUMENT_INSERT, 5, u" wor"),
+			(DOCUMENT_DELETE, 0, 2),
+		])
+		self.wavelet.applyOperations(opman.operations)
+		self.assertEqual(Blip.objects.get(pk=self.blip.pk).text, u"llo wor")
+	
+	def test_interleaved_blips(self):
+		other = Blip(wavelet=self.wavelet, creator=self.blip.creator, text=u"World")
+		other.save()
+		ops = [
+			self.op(DOCUMENT_INSERT, 5, u"!"),
+			self.op(DOCUMENT_INSERT, 0, u"Hi ", other.id),
+			self.op(DOCUMENT_DELETE, 0, 1),
+			self.op(DOCUMENT_DELETE, 3, 1, other.id),
+		]
+		# One query for both blips, two per operation, two per blip to save
+		self.assertEqual(count_queries(self.wavelet.applyOperations, ops), 1 + 4*2 + 2*2)
+		self.assertEqual(Blip.objects.get(pk=self.blip.pk).text, u"ello!")
+		self.assertEqual(Blip.objects.get(pk=other.pk).text, u"Hi orld")
+	
+	def test_foreign_blip(self):
+		foreign = create_wavelet(u"Foreign").root_blip
+		ops = [self.op(DOCUMENT_INSERT, 0, u"x"), self.op(DOCUMENT_INSERT, 0, u"x", foreign.id)]
+		self.assertRaises(Blip.DoesNotExist, self.wavelet.applyOperations, ops)
+		self.assertEqual(Blip.objects.get(pk=self.blip.pk).text, u"Hello")
+		self.assertEqual(Blip.objects.get(pk=foreign.pk).text, u"Foreign")
+	
+	def test_typing_queries(self):
+		opman = OpManager(self.wavelet.wave.id, self.wavelet.id)
+		opman.put([self.op(DOCUMENT_INSERT, 5 + i, u"x") for i in xrange(200)])
+		opman.normalize()
+		self.assertEqual(len(opman.operations), 1)
+		# Load the blip, move annotations and elements once, save the blip
+		self.assertEqual(count_queries(self.wavelet.applyOperations, opman.operations), 5)
+		self.assertEqual(Blip.objects.get(pk=self.blip.pk).text, u"Hello" + u"x" * 200)
+
+class ApplyOperationBundleTest(TransactionTestCase):
+	"""
+	A failing operation rolls back the whole bundle.
+	
+	"""
+	
+	def setUp(self):
+		self.wavelet = create_wavelet(u"Hello")
+		transaction.commit_unless_managed()
+	
+	def assertUnchanged(self, wavelet):
+		self.assertEqual(wavelet.version, self.wavelet.version)
+		self.assertEqual(Wavelet.objects.get(pk=wavelet.pk).version, self.wavelet.version)
+		self.assertEqual(Blip.objects.get(pk=wavelet.root_blip_id).text, u"Hello")
+		self.assertEqual(Element.objects.filter(blip=wavelet.root_blip_id).count(), 0)
+		self.assertEqual(Delta.objects.filter(wavelet=wavelet).count(), 0)
+	
+	def test_failing_operation(self):
+		wavelet = Wavelet.objects.get(pk=self.wavelet.pk)
+		blip_id = wavelet.root_blip_id
+		opman = OpManager(wavelet.wave.id, wavelet.id)
+		opman.put([
+			Operation(DOCUMENT_INSERT, wavelet.wave.id, wavelet.id, blip_id, 0, u"abc"),
+			Operation(DOCUMENT_ELEMENT_INSERT, wavelet.wave.id, wavelet.id, blip_id, 1, {"type": 5, "properties": {"value": "label"}}),
+			Operation(DOCUMENT_ELEMENT_DELETE, wavelet.wave.id, wavelet.id, blip_id, 4, None), # There is no element
+		])
+		self.assertRaises(Element.DoesNotExist, wavelet.applyOperationBundle, opman)
+		self.assertUnchanged(wavelet)
+	
+	def test_failing_delta(self):
+		wavelet = Wavelet.objects.get(pk=self.wavelet.pk)
+		opman = OpManager(wavelet.wave.id, "missing!conv+root") # The Delta cannot be created
+		opman.put([Operation(DOCUMENT_INSERT, wavelet.wave.id, wavelet.id, wavelet.root_blip_id, 0, u"abc")])
+		self.assertRaises(Wavelet.DoesNotExist, wavelet.applyOperationBundle, opman)
+		self.assertUnchanged(wavelet)
+
+class ChecksumTest(TestCase):
+	"""
+	Checksum formats and algorithm negotiation.
+	
+	"""
+	
+	def test_negotiate(self):
+		self.assertEqual(negotiate_checksum(["crc32", "sha1"]), "crc32")
+		self.assertEqual(negotiate_checksum(["sha1", "crc32"]), "sha1")
+		self.assertEqual(negotiate_checksum(["md5", "crc32"]), "crc32")
+		self.assertEqual(negotiate_checksum(["crc32", "sha1"], ("sha1",)), "sha1") # Disabled in the settings
+		self.assertEqual(negotiate_checksum(["md5"]), "sha1")
+		self.assertEqual(negotiate_checksum([]), "sha1")
+		self.assertEqual(negotiate_checksum(None), "sha1") # Not offered by older clients
+		self.assertEqual(negotiate_checksum("crc32"), "sha1")
+	
+	def test_crc32(self):
+		self.assertEqual(checksum(u"hello", "crc32"), "crc32:3610a686")
+		self.assertEqual(checksum(u"", "crc32"), "crc32:00000000")
+		self.assertEqual(checksum(u"\xe4bc", "crc32"), "crc32:18bd528f") # UTF-8 encoded
+		self.assertEqual(crc32_constructor("123456789").hexdigest(), "cbf43926")
+		crc = crc32_constructor("hel")
+		copy = crc.copy()
+		crc.update("lo")
+		self.assertEqual(crc.hexdigest(), "3610a686")
+		self.assertEqual(copy.hexdigest(), crc32_constructor("hel").hexdigest())
+	
+	def test_sha1(self):
+		self.assertEqual(checksum(u"hello"), "aaf4c61ddcc5e8a2dabede0f3b482cd9aea9434d")
+		self.assertEqual(checksum(u"hello", "sha1"), checksum(u"hello"))
+	
+	def test_blipsums(self):
+		wavelet = create_wavelet(u"hello")
+		blip_id = wavelet.root_blip_id
+		self.assertEqual(wavelet.blipsums("crc32"), {blip_id: "crc32:3610a686"})
+		self.assertEqual(wavelet.blipsums("sha1"), {blip_id: "aaf4c61ddcc5e8a2dabede0f3b482cd9aea9434d"})
+		self.assertEqual(wavelet.blipsums(), wavelet.blipsums("sha1"))
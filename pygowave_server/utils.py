@@ -19,8 +19,9 @@
 from django.core.files.uploadedfile import UploadedFile
 from django.conf import settings
 from django.db.models import get_model
+from django.db import connection, transaction, IntegrityError
 
-import string, random, time
+import string, time, os, threading
 
 class AlreadyUploadedFile(UploadedFile):
 	"""
@@ -80,24 +81,184 @@ def get_profile_model():
 	return profile_mod
 
 RANDOM_ID_BASE = string.letters+string.digits
+RANDOM_ID_BLOCK_SIZE = 256
+RANDOM_ID_MAX_TRIES = 5
+
+class RandomIdAllocator(object):
+	"""
+	Hands out random ids of a fixed length. Characters are taken from
+	RANDOM_ID_BASE and drawn from the operating system's CSPRNG (os.urandom).
+	Ids are pre-generated in blocks, so the entropy source is only queried
+	once every `block_size` ids.
+	
+	No uniqueness checks are performed; callers are expected to rely on the
+	primary key (or unique) constraint of the database.
+	
+	"""
+	
+	def __init__(self, length, block_size=RANDOM_ID_BLOCK_SIZE):
+		self.length = length
+		self.block_size = block_size
+		self._pool = []
+		self._lock = threading.Lock()
+	
+	def generate_block(self, count):
+		"""
+		Generate `count` new random ids.
+		
+		"""
+		base = RANDOM_ID_BASE
+		limit = 256 - (256 % len(base)) # Reject bytes which would bias the modulo
+		needed = count * self.length
+		chars = []
+		while len(chars) < needed:
+			for byte in os.urandom(needed - len(chars) + needed / 8 + 1):
+				byte = ord(byte)
+				if byte < limit:
+					chars.append(base[byte % len(base)])
+		return ["".join(chars[i:i+self.length]) for i in xrange(0, needed, self.length)]
+	
+	def next(self):
+		"""
+		Return the next random id from the current block.
+		
+		"""
+		self._lock.acquire()
+		try:
+			if not self._pool:
+				self._pool = self.generate_block(self.block_size)
+			return self._pool.pop()
+		finally:
+			self._lock.release()
+
+_allocators = {}
+
+def get_id_allocator(length):
+	"""
+	Return the (shared) RandomIdAllocator for ids of the given length.
+	
+	"""
+	allocator = _allocators.get(length, None)
+	if allocator == None:
+		allocator = _allocators.setdefault(length, RandomIdAllocator(length))
+	return allocator
+
 def gen_random_id(length):
 	"""
 	Generate a random string with the given length.
-	Characgters are taken from RANDOM_ID_BASE.
+	Characters are taken from RANDOM_ID_BASE.
 	
 	"""
-	return "".join([random.choice(RANDOM_ID_BASE) for x in xrange(length)])
+	return get_id_allocator(length).next()
 
-def find_random_id(manager, length, suffix="", prefix=""):
+def insert_with_random_id(save, assign, max_tries=RANDOM_ID_MAX_TRIES):
 	"""
-	Generates a random id for obj, checks if it exists and retries in
-	case of collision. Returns the found number.
+	Insert a new object with random id(s) without checking for collisions
+	beforehand. `assign` is called to (re-)assign the random values, `save`
+	must perform the actual INSERT. If the database reports an IntegrityError
+	(i.e. a collision occured) the insert is rolled back to a savepoint and
+	retried with new values, up to `max_tries` times.
 	
 	"""
-	rnd_id = prefix + gen_random_id(length) + suffix
-	while manager.filter(pk=rnd_id).count() > 0:
-		rnd_id = prefix + gen_random_id(length) + suffix
-	return rnd_id
+	for attempt in xrange(max_tries):
+		assign()
+		sid = transaction.savepoint()
+		try:
+			save()
+		except IntegrityError:
+			transaction.savepoint_rollback(sid)
+			if attempt == max_tries - 1:
+				raise
+		else:
+			transaction.savepoint_commit(sid)
+			return
+
+BULK_INSERT_CHUNK_SIZE = 500
+BULK_INSERT_MAX_PARAMS = 999 # SQLite's default limit of bound variables
+
+def bulk_insert(table, columns, rows, chunk_size=BULK_INSERT_CHUNK_SIZE):
+	"""
+	Insert the given rows (sequences of already prepared database values)
+	into `table` using multi-row INSERT statements with up to `chunk_size`
+	rows and BULK_INSERT_MAX_PARAMS parameters each.
+	
+	The statements bypass the ORM, so the current transaction is marked
+	dirty here; otherwise commit_on_success would not commit them.
+	
+	"""
+	if len(rows) == 0:
+		return
+	chunk_size = max(min(chunk_size, BULK_INSERT_MAX_PARAMS / len(columns)), 1)
+	qn = connection.ops.quote_name
+	row_sql = "(%s)" % (", ".join(["%s"] * len(columns)))
+	cursor = connection.cursor()
+	for start in xrange(0, len(rows), chunk_size):
+		chunk = rows[start:start+chunk_size]
+		params = []
+		for row in chunk:
+			params.extend(row)
+		cursor.execute("INSERT INTO %s (%s) VALUES %s" % (
+			qn(table),
+			", ".join([qn(c) for c in columns]),
+			", ".join([row_sql] * len(chunk))
+		), params)
+	transaction.set_dirty()
+
+class LRUCache(object):
+	"""
+	A mapping which holds at most `max_size` items. If full, the least
+	recently used item is discarded on insertion. Not thread-safe.
+	
+	"""
+	
+	def __init__(self, max_size):
+		self.max_size = max_size
+		self._map = {}
+		self._root = [None, None, None, None] # prev, next, key, value
+		self._root[0] = self._root[1] = self._root
+	
+	def get(self, key, default=None):
+		link = self._map.get(key, None)
+		if link == None:
+			return default
+		self._unlink(link)
+		self._append(link)
+		return link[3]
+	
+	def set(self, key, value):
+		link = self._map.get(key, None)
+		if link != None:
+			link[3] = value
+			self._unlink(link)
+		else:
+			if len(self._map) >= self.max_size:
+				oldest = self._root[1]
+				self._unlink(oldest)
+				del self._map[oldest[2]]
+			link = [None, None, key, value]
+			self._map[key] = link
+		self._append(link)
+	
+	def delete(self, key):
+		link = self._map.pop(key, None)
+		if link != None:
+			self._unlink(link)
+	
+	def __contains__(self, key):
+		return self._map.has_key(key)
+	
+	def __len__(self):
+		return len(self._map)
+	
+	def _unlink(self, link):
+		link[0][1] = link[1]
+		link[1][0] = link[0]
+	
+	def _append(self, link):
+		last = self._root[0]
+		link[0] = last
+		link[1] = self._root
+		last[1] = self._root[0] = link
 
 def datetime2milliseconds(dt):
 	"""
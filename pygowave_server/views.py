@@ -17,20 +17,25 @@
 #
 
 from django.shortcuts import render_to_response
+from django.template.loader import render_to_string
 from django.template import RequestContext
-from django.http import HttpResponseRedirect, HttpResponse
+from django.http import HttpResponseRedirect, HttpResponse, HttpResponseNotModified
 from django.core.urlresolvers import reverse
 from django.core.exceptions import ObjectDoesNotExist
 from django.contrib import auth
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.models import User
 from django.conf import settings as django_settings
 from django.utils.translation import ugettext as _
+from django.utils import translation
+from django.utils.hashcompat import sha_constructor
 from django.utils import simplejson
+from django.core.cache import cache
 
 from pygowave_server.forms import ParticipantProfileForm, GadgetRegistryForm, NewWaveForm
-from pygowave_server.models import Participant, Gadget, Wave, GadgetElement
+from pygowave_server.models import Participant, Gadget, Wave, Wavelet, GadgetElement, inbox_digest_key
 from pygowave_server.engine import GadgetLoader
+from pygowave_server.presence import presence
+from pygowave_server import counters
 
 from datetime import datetime, timedelta
 import urllib2
@@ -41,12 +46,7 @@ def index(request):
 	
 	# Handle logout
 	if request.user.is_authenticated() and request.GET.has_key("logout"):
-		try:
-			p = request.user.get_profile()
-			p.last_contact = datetime.now() + timedelta(minutes=django_settings.ONLINE_TIMEOUT_MINUTES+1)
-			p.save()
-		except:
-			pass
+		presence.logout(request.user, datetime.now() + timedelta(minutes=django_settings.ONLINE_TIMEOUT_MINUTES+1))
 		auth.logout(request)
 	
 	if request.user.is_authenticated(): # Kick auth'd users to home view
@@ -63,15 +63,15 @@ def index(request):
 	else:
 		login_form = auth.forms.AuthenticationForm()
 	
-	online_count = Participant.objects.online_count()
-	users_count = User.objects.filter(is_active=True).count()
+	online_count = counters.online_count()
+	users_count = counters.users_count()
 		
 	return render_to_response('pygowave_server/index.html', {"login_form": login_form, "auth_fail": auth_fail, "online_count": online_count, "users_count": users_count}, context_instance=RequestContext(request))
 
 @login_required
 def home(request):
-	online_count = Participant.objects.online_count()
-	users_count = User.objects.filter(is_active=True).count()
+	online_count = counters.online_count()
+	users_count = counters.users_count()
 	try:
 		profile = request.user.get_profile()
 	except ObjectDoesNotExist:
@@ -115,17 +115,60 @@ def wave_list(request):
 	else:
 		form = NewWaveForm()
 	
-	waves = []
-	for wavelet in participant.wavelets.all():
-		wave = wavelet.wave
-		waves.append({
-			"id": wave.id,
-			"title": wavelet.title,
-			"participants_count": wavelet.participants.count(),
-			"created": wavelet.created,
-			"creator_name": wavelet.creator.name,
-		})
-	return render_to_response('pygowave_server/waves/wave_list.html', {"waves": waves, "form": form}, context_instance=RequestContext(request))
+	before = None
+	if request.GET.has_key("before"):
+		try:
+			before = decode_wave_list_cursor(request.GET["before"])
+		except ValueError:
+			pass # Show first page
+	
+	page_size = getattr(django_settings, "WAVE_LIST_PAGE_SIZE", 50)
+	cache_seconds = getattr(django_settings, "WAVE_LIST_CACHE_SECONDS", 0)
+	use_cache = before == None and cache_seconds > 0
+	
+	page = None
+	if use_cache:
+		page = cache.get(inbox_digest_key(participant.id))
+	if page == None:
+		wavelets = list(Wavelet.objects.inbox(participant, before, page_size+1))
+		waves = []
+		for wavelet in wavelets[:page_size]:
+			waves.append({
+				"id": wavelet.wave_id,
+				"title": wavelet.title,
+				"participants_count": wavelet.participants_count,
+				"created": wavelet.created,
+				"creator_name": wavelet.creator.name,
+			})
+		next_cursor = None
+		if len(wavelets) > page_size:
+			last = wavelets[page_size-1]
+			next_cursor = encode_wave_list_cursor(last.last_modified, last.id)
+		page = (waves, next_cursor)
+		if use_cache:
+			cache.set(inbox_digest_key(participant.id), page, cache_seconds)
+	
+	waves, next_cursor = page
+	return render_to_response('pygowave_server/waves/wave_list.html', {"waves": waves, "form": form, "next_cursor": next_cursor, "is_first_page": before == None}, context_instance=RequestContext(request))
+
+def encode_wave_list_cursor(last_modified, id):
+	"""
+	Encode the position of a wavelet in the wave list for the URL.
+	
+	"""
+	return "%s%06d_%s" % (last_modified.strftime("%Y%m%d%H%M%S"), last_modified.microsecond, id)
+
+def decode_wave_list_cursor(cursor):
+	"""
+	Decode a wave list cursor to a (last_modified, id) tuple.
+	Throws ValueError if the cursor is malformed.
+	
+	"""
+	timestamp, id = cursor.split("_", 1)
+	if len(timestamp) != 20:
+		raise ValueError("Malformed cursor")
+	last_modified = datetime.strptime(timestamp[:14], "%Y%m%d%H%M%S").replace(microsecond=int(timestamp[14:]))
+	return last_modified, id
 
 @login_required
 def my_gadgets(request):
@@ -249,6 +292,7 @@ def gadget_loader(request):
 	except ValueError, e:
 		return render_to_response('pygowave_server/gadgets/gadget_error.html', {"error_message": _(u'Gadget quick-check failed: %s.') % (e.args[0])}, context_instance=RequestContext(request))
 	
+	userprefs = {}
 	if request.GET.has_key("gadget_id"):
 		gadget_id = int(request.GET["gadget_id"])
 		if gadget_id > 0:
@@ -256,8 +300,31 @@ def gadget_loader(request):
 				ge = GadgetElement.objects.get(pk=gadget_id)
 			except:
 				return render_to_response('pygowave_server/gadgets/gadget_error.html', {"error_message": _(u"GadgetElement could not be found.")}, context_instance=RequestContext(request))
-			gadget.update_prefs(ge.get_userprefs())
+			userprefs = ge.get_userprefs()
 	else:
 		gadget_id = None
-
-	return render_to_response('pygowave_server/gadgets/gadget_wrapper.html', {"gadget": gadget, "url_parameters": simplejson.dumps(request.GET), "gadget_id": gadget_id}, context_instance=RequestContext(request))
+	
+	url_parameters = simplejson.dumps(request.GET)
+	
+	# The output only depends on the gadget's version, the userprefs, the URL
+	# parameters and the language
+	etag = sha_constructor("\n".join([
+		gadget.version,
+		simplejson.dumps(userprefs, sort_keys=True),
+		url_parameters,
+		translation.get_language(),
+	])).hexdigest()
+	
+	if request.META.get("HTTP_IF_NONE_MATCH", None) == '"%s"' % (etag):
+		return HttpResponseNotModified()
+	
+	cache_key = "pygowave_gadget_wrapper_%s" % (etag)
+	content = cache.get(cache_key)
+	if content == None:
+		gadget.update_prefs(userprefs)
+		content = render_to_string('pygowave_server/gadgets/gadget_wrapper.html', {"gadget": gadget, "url_parameters": url_parameters, "gadget_id": gadget_id}, context_instance=RequestContext(request))
+		cache.set(cache_key, content, getattr(django_settings, "GADGET_RENDER_CACHE_SECONDS", 3600))
+	
+	response = HttpResponse(content)
+	response["ETag"] = '"%s"' % (etag)
+	return response
@@ -146,15 +146,65 @@ AVATAR_URL = MEDIA_URL + 'avatars/'
 GADGET_ROOT = MEDIA_ROOT + 'gadgets/'
 GADGET_URL = MEDIA_URL + 'gadgets/'
 
+# Parsed gadget specifications are cached by URL: Number of cached gadgets,
+# seconds until revalidation and seconds a stale gadget may still be served
+# while it is revalidated in the background
+GADGET_CACHE_SIZE = 256
+GADGET_CACHE_FRESH_SECONDS = 300
+GADGET_CACHE_STALE_SECONDS = 3600
+
+# Gadgets are downloaded by a pool of worker threads: Number of workers,
+# concurrent downloads per host, timeouts in seconds and maximum size in bytes
+GADGET_FETCH_WORKERS = 4
+GADGET_FETCH_PER_HOST = 2
+GADGET_FETCH_CONNECT_TIMEOUT = 5
+GADGET_FETCH_READ_TIMEOUT = 10
+GADGET_FETCH_MAX_SIZE = 524288
+
+# Time to cache rendered gadget wrappers (keyed by gadget version and prefs)
+GADGET_RENDER_CACHE_SECONDS = 3600
+
+# Client scripts: seconds between checks for changed sources and whether to
+# serve only scripts built by "manage.py buildclient" (recommended for
+# production; run the command after each deployment), whether to minify them
+# and whether to load them as one combined script
+CLIENT_ASSET_CHECK_INTERVAL = 2
+CLIENT_PRECOMPILED = False
+CLIENT_MINIFY = False
+CLIENT_COMBINED = False
+
+# Let the web server send precompiled client scripts: None, "x-sendfile" or
+# "x-accel-redirect" (nginx; CLIENT_SENDFILE_URL must be an internal location
+# aliased to pygowave_client/cache/)
+CLIENT_SENDFILE = None
+CLIENT_SENDFILE_URL = "/internal/pygowave_client/"
+
 # Used if a user doesn't log out properly
 ONLINE_TIMEOUT_MINUTES = 10
 
+# Minimum interval between two writes of a user's last contact time
+ONLINE_FLUSH_INTERVAL_SECONDS = 60
+
+# Time to cache the online and user counters on the index/home pages
+COUNTERS_CACHE_SECONDS = 30
+
+# Number of waves per page in the wave list
+WAVE_LIST_PAGE_SIZE = 50
+
+# Time to cache the first page of a user's wave list; 0 disables the cache.
+# Use a cache backend shared with the RPC server when enabling this.
+WAVE_LIST_CACHE_SECONDS = 0
+
 # Used if a user somehow doesn't use his generated access key in time
 ACCESS_KEY_TIMEOUT_MINUTES = 2
 
 # Minimum characters to engage a search
 PARTICIPANT_SEARCH_LENGTH = 3
 
+# Blip checksum algorithms a client may choose from when it opens a wavelet
+# ("crc32", "sha1"); SHA-1 is always used as fallback
+CHECKSUM_ALGORITHMS = ("crc32", "sha1")
+
 # RabbitMQ settings here
 AMQP_SERVER = "localhost"
 AMQP_PORT = 5672